@@ -1,12 +1,194 @@
+import datetime
 import imaplib
-import email
 import re
 import time
 import socket # For socket.error
-from email.header import decode_header
+from email import policy
+from email.parser import BytesParser
 from .logger import log
 from .security import decrypt
 
+# Email payloads are scanned as raw bytes, where \d and \b are ASCII-only (codes are always 0-9)
+_CODE_RE_BYTES = re.compile(rb'\b(\d{6})\b')
+_HTML_TAG_RE_BYTES = re.compile(rb'<[^<]+?>')
+# Transfer encodings whose raw bytes can hide or split a code (QP soft line breaks, e.g. 4829=\r\n13)
+_ENCODED_RE_BYTES = re.compile(rb'base64|quoted-printable', re.IGNORECASE)
+_BOUNDARY_LINE_RE_BYTES = re.compile(rb'^--[^\r\n]*', re.MULTILINE)
+
+# Reused for every fetched email instead of building a new parser per message_from_bytes() call
+_PARSER = BytesParser(policy=policy.compat32)
+
+# How far before the start of get_2fa_code a 2FA email may have arrived and still be considered fresh
+_YOUNGER_SLACK_SECONDS = 5 * 60
+
+# Polling waits grow by this factor per poll, capped at the maximum (or the configured interval if larger)
+_POLL_BACKOFF_FACTOR = 1.5
+_MAX_POLL_INTERVAL_SECONDS = 15
+
+# Only the MIME headers needed to decode the body are fetched, and PEEK leaves the \Seen flag untouched
+_FETCH_PARTS = "(BODY.PEEK[HEADER.FIELDS (MIME-VERSION CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] BODY.PEEK[TEXT])"
+
+# Matches the MAX result of an ESEARCH response, e.g. b'(TAG "A5") UID MAX 44'
+_ESEARCH_MAX_RE = re.compile(rb'\bMAX (\d+)')
+
+_IMAP_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+def imap_date(day) -> str:
+    """Formats a date as an IMAP search date (e.g. 05-Mar-2024); unlike strftime('%b'), independent of the locale."""
+    return f"{day.day:02d}-{_IMAP_MONTHS[day.month - 1]}-{day.year}"
+
+def _quote(value: str) -> str:
+    """Quotes a value as an IMAP quoted string; imaplib sends search arguments verbatim."""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _iter_text_parts(msg):
+    """Yields the leaf text/* parts of an email, descending only into multipart containers and skipping attachments."""
+    if msg.is_multipart():
+        for part in msg.get_payload():
+            yield from _iter_text_parts(part)
+    elif msg.get_content_maintype() == "text" and msg.get_content_disposition() != "attachment":
+        yield msg
+
+def _find_code(msg) -> str:
+    """
+    Searches an email for a 6-digit code and returns it, or None when not found.
+    Payloads are scanned as raw bytes, so they are never decoded to str; text/html parts
+    are only tag-stripped when no plain-text part contains a code.
+    """
+    html_parts = []
+    for part in _iter_text_parts(msg):
+        content_type = part.get_content_type()
+        if content_type == "text/plain":
+            payload = part.get_payload(decode=True)
+            match = _CODE_RE_BYTES.search(payload) if payload else None
+            if match:
+                return match.group(0).decode('ascii')
+        elif content_type == "text/html":
+            html_parts.append(part)
+
+    for part in html_parts:
+        payload = part.get_payload(decode=True)
+        if not payload:
+            continue
+        # Basic HTML to text conversion (remove tags) so attribute values such as colours are not matched
+        match = _CODE_RE_BYTES.search(_HTML_TAG_RE_BYTES.sub(b'', payload))
+        if match:
+            return match.group(0).decode('ascii')
+    return None
+
+def find_code_fast(raw_headers: bytes, raw_body: bytes) -> str:
+    """
+    Fast path for _find_code that works on the fetched bytes without building an email.Message.
+    Returns the code only when the tag-stripped body holds exactly one distinct 6-digit number
+    (the same code in the plain and HTML parts is fine); base64 or quoted-printable content and
+    ambiguous matches return None.
+    """
+    if _ENCODED_RE_BYTES.search(raw_headers) or _ENCODED_RE_BYTES.search(raw_body):
+        return None
+    # MIME boundary lines may carry digits of their own
+    text = _BOUNDARY_LINE_RE_BYTES.sub(b'', _HTML_TAG_RE_BYTES.sub(b'', raw_body))
+    codes = set(_CODE_RE_BYTES.findall(text))
+    if len(codes) == 1:
+        return codes.pop().decode('ascii')
+    return None
+
+def _body_snippet(msg, length: int = 200) -> str:
+    """Returns the start of the first non-empty text part, for logging emails without a code."""
+    for part in _iter_text_parts(msg):
+        payload = part.get_payload(decode=True)
+        if payload:
+            charset = part.get_content_charset() or 'utf-8'
+            try:
+                return payload[:length * 4].decode(charset, errors='replace')[:length]
+            except LookupError: # Unknown charset label in the Content-Type header
+                return payload[:length * 4].decode('utf-8', errors='replace')[:length]
+    return ""
+
+def _connect(imap_server: str, email_address: str, app_password: str) -> imaplib.IMAP4_SSL:
+    """Opens an IMAP session, logs in and selects the inbox."""
+    log.debug(f"Connecting to IMAP server: {imap_server}...")
+    mail = imaplib.IMAP4_SSL(imap_server)
+    try:
+        log.debug(f"Logging in as {email_address}...")
+        mail.login(email_address, app_password)
+        log.debug("Selecting inbox...")
+        mail.select("inbox")
+    except Exception:
+        _logout(mail, email_address)
+        raise
+    return mail
+
+def _search_latest_uid(mail, criteria: list):
+    """
+    Returns the UID of the newest message matching the search criteria, or None when nothing matches.
+    Servers advertising ESEARCH (RFC 4731) are asked for RETURN (MAX), so only one UID comes back
+    instead of every match; otherwise (or if the server rejects it) a plain UID SEARCH is used.
+    """
+    if "ESEARCH" in mail.capabilities:
+        try:
+            status, _ = mail.uid('SEARCH', 'RETURN', '(MAX)', *criteria)
+            if status == "OK":
+                # imaplib files the untagged ESEARCH reply under its own name rather than returning it
+                _, esearch_data = mail.response('ESEARCH')
+                for line in esearch_data:
+                    match = _ESEARCH_MAX_RE.search(line) if line else None
+                    if match:
+                        return match.group(1)
+                return None
+        except imaplib.IMAP4.error as e:
+            log.debug(f"ESEARCH RETURN (MAX) rejected by server ({e}); falling back to plain UID SEARCH.")
+
+    status, messages = mail.uid('SEARCH', *criteria)
+    if status == "OK" and messages[0]:
+        return messages[0].split()[-1] # UIDs are ascending, so the last one is the most recent email
+    return None
+
+def _mark_consumed(mail, email_uid, email_address: str, delete: bool):
+    """
+    Flags a used 2FA email as \\Seen (and optionally deletes it) so later UNSEEN searches stay small.
+    Deletion expunges only this message, via UID EXPUNGE (RFC 4315), on servers that support it;
+    elsewhere it is just flagged \\Deleted, since a plain EXPUNGE would remove every flagged message.
+    Failures are only logged; the code has already been extracted.
+    """
+    try:
+        if delete:
+            mail.uid('STORE', email_uid, '+FLAGS', '(\\Seen \\Deleted)')
+            if "UIDPLUS" in mail.capabilities:
+                mail.uid('EXPUNGE', email_uid)
+        else:
+            mail.uid('STORE', email_uid, '+FLAGS', '\\Seen')
+    except Exception as e:
+        log.warning(f"Could not mark 2FA email {email_uid} as read for {email_address}: {e}")
+
+def _logout(mail, email_address: str):
+    """Logs out of an IMAP session, ignoring errors from an already-broken connection."""
+    if mail is None:
+        return
+    try:
+        log.debug(f"Logging out from IMAP server ({email_address}).")
+        mail.logout()
+    except Exception as e_logout:
+        log.error(f"Error during IMAP logout for {email_address}: {e_logout}")
+
+def wait_for_new_mail(mail, wait_seconds: float, cancel_event=None):
+    """
+    Blocks until the server pushes an EXISTS notification or wait_seconds elapse.
+    Uses IMAP IDLE (RFC 2177) when both imaplib (Python 3.14+) and the server support it,
+    otherwise falls back to sleeping for the polling interval. The sleep also ends early
+    once cancel_event (a threading.Event), if given, is set.
+    """
+    if not hasattr(mail, "idle") or "IDLE" not in mail.capabilities:
+        if cancel_event is not None:
+            cancel_event.wait(wait_seconds)
+        else:
+            time.sleep(wait_seconds)
+        return
+    with mail.idle(duration=wait_seconds) as idler:
+        for response_type, _ in idler:
+            if response_type == "EXISTS":
+                log.debug("IMAP IDLE reported new mail.")
+                break
+
 def get_2fa_code(config: dict, master_password: str = None) -> str:
     """
     Connects to an IMAP server to fetch a 6-digit 2FA code from the latest email.
@@ -18,123 +200,124 @@ def get_2fa_code(config: dict, master_password: str = None) -> str:
     sender = config.get("confirmation_email_sender")
     timeout = config.get("email_check_timeout_seconds", 90) # Clarified unit
     polling_interval = config.get("email_polling_interval_seconds", 5) # New
+    delete_after_read = config.get("email_delete_after_read", False)
 
     log.info(f"Attempting to fetch 2FA code from {email_address} via {imap_server}. Sender: '{sender}'. Timeout: {timeout}s, Polling: {polling_interval}s.")
     
-    start_time = time.time()
-    
-    while time.time() - start_time < timeout:
-        mail = None # Initialize mail to None for each attempt cycle
+    # Configuration errors fail fast here instead of being retried until the timeout
+    for key, value in (("email_address", email_address), ("email_imap_server", imap_server), ("confirmation_email_sender", sender)):
+        if not value:
+            log.error(f"'{key}' is missing from the email configuration.")
+            raise ValueError(f"Email configuration is missing '{key}'")
+
+    if not app_password_val:
+        log.error(f"Email app password not found in config for {email_address}.")
+        raise ValueError(f"Email app password not found for {email_address}")
+
+    # Classify the configured password once: (encrypted?, master password available?)
+    needs_decrypt = isinstance(app_password_val, str) and app_password_val.startswith("enc:")
+    actual_app_password = app_password_val
+    if needs_decrypt and master_password:
         try:
-            log.debug(f"Connecting to IMAP server: {imap_server}...")
-            mail = imaplib.IMAP4_SSL(imap_server)
-            log.debug(f"Logging in as {email_address}...")
+            log.debug(f"Attempting to decrypt email app password for {email_address}.")
+            actual_app_password = decrypt(app_password_val, master_password)
+            if not actual_app_password: # Decryption failed but didn't raise error, or returned empty
+                log.error(f"Failed to decrypt email app password for {email_address}, or result was empty.")
+                raise ValueError(f"Decryption failed for email app password for {email_address}")
+            log.info(f"Successfully decrypted email app password for {email_address}.")
+        except Exception as e:
+            log.error(f"Error decrypting email app password for {email_address}: {e}", exc_info=True)
+            raise ValueError(f"Decryption error for email app password for {email_address}: {e}")
+    elif needs_decrypt:
+        log.error(f"Email app password for {email_address} appears encrypted, but no master password provided.")
+        raise ValueError(f"Encrypted email app password found for {email_address} but no master password provided.")
+    elif master_password:
+        log.warning(f"Master password provided for {email_address}, but app password does not appear encrypted. Using as is.")
 
-            if not app_password_val:
-                log.error(f"Email app password not found in config for {email_address}.")
-                raise ValueError(f"Email app password not found for {email_address}")
+    start_time = time.time()
+    # SINCE compares against the server's local date, so allow one day of slack for timezone differences
+    since_date = imap_date(datetime.datetime.fromtimestamp(start_time - 24 * 60 * 60, datetime.timezone.utc).date())
+    mail = None # Single IMAP session reused across polls; reset only when it errors out
 
-            actual_app_password = app_password_val
-            if master_password and isinstance(app_password_val, str) and app_password_val.startswith("enc:"):
-                try:
-                    log.debug(f"Attempting to decrypt email app password for {email_address}.")
-                    actual_app_password = decrypt(app_password_val, master_password)
-                    if not actual_app_password: # Decryption failed but didn't raise error, or returned empty
-                        log.error(f"Failed to decrypt email app password for {email_address}, or result was empty.")
-                        raise ValueError(f"Decryption failed for email app password for {email_address}")
-                    log.info(f"Successfully decrypted email app password for {email_address}.")
-                except Exception as e:
-                    log.error(f"Error decrypting email app password for {email_address}: {e}", exc_info=True)
-                    raise ValueError(f"Decryption error for email app password for {email_address}: {e}")
-            elif master_password and isinstance(app_password_val, str) and not app_password_val.startswith("enc:"):
-                log.warning(f"Master password provided for {email_address}, but app password does not appear encrypted. Using as is.")
-            elif not master_password and isinstance(app_password_val, str) and app_password_val.startswith("enc:"):
-                log.error(f"Email app password for {email_address} appears encrypted, but no master password provided.")
-                raise ValueError(f"Encrypted email app password found for {email_address} but no master password provided.")
-
-            mail.login(email_address, actual_app_password)
-            log.debug("Selecting inbox...")
-            mail.select("inbox")
-            log.debug(f"Searching for unseen email from sender: {sender}...")
+    poll_attempt = 0
+    max_wait_seconds = max(polling_interval, _MAX_POLL_INTERVAL_SECONDS)
+
+    try:
+        while True:
+            try:
+                if mail is None:
+                    mail = _connect(imap_server, email_address, actual_app_password)
+                    poll_attempt = 0 # Fresh session: start again from the configured polling interval
+                else:
+                    mail.noop() # Keepalive on the reused session; also flushes pending mailbox updates
+                log.debug(f"Searching for unseen email from sender: {sender}...")
             
-            # Search for unseen emails from the specific sender
-            status, messages = mail.search(None, f'(UNSEEN FROM "{sender}")')
+                # Search for unseen emails from the specific sender, bounded to recent mail so stale codes are never picked
+                criteria = ['UNSEEN', 'FROM', _quote(sender), 'SINCE', since_date]
+                if "WITHIN" in mail.capabilities: # RFC 5032: narrow to mail received since shortly before this call
+                    criteria += ['YOUNGER', str(int(time.time() - start_time) + _YOUNGER_SLACK_SECONDS)]
+                latest_email_uid = _search_latest_uid(mail, criteria)
 
-            if status == "OK" and messages[0]:
-                latest_email_id = messages[0].split()[-1] # Get the ID of the most recent email
-                log.info(f"Found new email from sender '{sender}'. Fetching content for email ID {latest_email_id}...")
+                if latest_email_uid:
+                    log.info(f"Found new email from sender '{sender}'. Fetching content for email UID {latest_email_uid}...")
                 
-                status, msg_data = mail.fetch(latest_email_id, "(RFC822)")
-                if status == "OK":
-                    for response_part in msg_data:
-                        if isinstance(response_part, tuple):
-                            msg = email.message_from_bytes(response_part[1])
-                            body = ""
-                            if msg.is_multipart():
-                                for part in msg.walk():
-                                    content_type = part.get_content_type()
-                                    # Prefer text/plain, but fallback to text/html
-                                    if "text/plain" in content_type:
-                                        try:
-                                            body = part.get_payload(decode=True).decode('utf-8', errors='replace')
-                                            break
-                                        except:
-                                            continue
-                                    elif "text/html" in content_type and not body: # Only use html if plain not found
-                                        try:
-                                            # Basic HTML to text conversion (remove tags)
-                                            html_body = part.get_payload(decode=True).decode('utf-8', errors='replace')
-                                            body = re.sub('<[^<]+?>', '', html_body)
-                                        except:
-                                            continue
-                            else: # Not multipart
-                                try:
-                                    body = msg.get_payload(decode=True).decode('utf-8', errors='replace')
-                                except:
-                                    pass # Could not decode
-
-                            if body:
-                                # Regex to find a 6-digit code
-                                match = re.search(r'\b(\d{6})\b', body)
-                                if match:
-                                    code = match.group(0)
-                                    log.info(f"Successfully extracted 2FA code: {code} from email for {email_address}")
-                                    # Logout is handled in finally
-                                    return code
-                                else:
-                                    log.warning(f"Could not find a 6-digit code in the latest email from '{sender}' for {email_address}. Body snippet: {body[:200]}...")
-                            else:
-                                log.warning(f"Email body from '{sender}' for {email_address} was empty or could not be decoded.")
+                    status, msg_data = mail.uid('FETCH', latest_email_uid, _FETCH_PARTS)
+                    if status == "OK":
+                        fetched_parts = [part for part in msg_data if isinstance(part, tuple)]
+                        raw_headers = b"".join(part[1] for part in fetched_parts if b"HEADER" in part[0])
+                        raw_body = b"".join(part[1] for part in fetched_parts if b"HEADER" not in part[0])
+                        code = find_code_fast(raw_headers, raw_body)
+                        if not code:
+                            # Ambiguous or encoded: re-assemble the MIME headers and body text into one message and walk it
+                            msg = _PARSER.parsebytes(raw_headers + raw_body)
+                            code = _find_code(msg)
+
+                        if code:
+                            log.info(f"Successfully extracted 2FA code: {code} from email for {email_address}")
+                            _mark_consumed(mail, latest_email_uid, email_address, delete_after_read)
+                            # Logout is handled in finally
+                            return code
+                        body_snippet = _body_snippet(msg)
+                        if body_snippet:
+                            log.warning(f"Could not find a 6-digit code in the latest email from '{sender}' for {email_address}. Body snippet: {body_snippet}...")
+                        else:
+                            log.warning(f"Email body from '{sender}' for {email_address} was empty or could not be decoded.")
+                    else:
+                        log.warning(f"Failed to fetch email content for UID {latest_email_uid} from '{sender}' for {email_address}.")
                 else:
-                    log.warning(f"Failed to fetch email content for ID {latest_email_id} from '{sender}' for {email_address}.")
-            else:
-                 log.info(f"No unread email from sender '{sender}' found this poll for {email_address}.")
+                     log.info(f"No unread email from sender '{sender}' found this poll for {email_address}.")
 
-        except ConnectionRefusedError as e:
-            log.error(f"IMAP connection refused for {imap_server}: {e}. Aborting check for {email_address}.")
-            break
-        except (imaplib.IMAP4.error, socket.error) as e:
-            log.error(f"IMAP/socket error for {email_address} on {imap_server}: {e}. Will retry after polling interval.")
-        except Exception as e:
-            log.error(f"An unexpected error occurred while checking email for {email_address}: {e}")
-        finally:
-            if mail:
+            except ConnectionRefusedError as e:
+                log.error(f"IMAP connection refused for {imap_server}: {e}. Aborting check for {email_address}.")
+                break
+            except (imaplib.IMAP4.error, socket.error) as e:
+                log.error(f"IMAP/socket error for {email_address} on {imap_server}: {e}. Will reconnect after polling interval.")
+                _logout(mail, email_address)
+                mail = None
+            except Exception as e:
+                log.error(f"An unexpected error occurred while checking email for {email_address}: {e}")
+                _logout(mail, email_address)
+                mail = None
+
+            # Back off between polls, but never wait past the timeout so a final poll runs at the deadline
+            time_elapsed = time.time() - start_time
+            if time_elapsed >= timeout:
+                log.info(f"Timeout reached for {email_address} while waiting for email from '{sender}'.")
+                break
+            wait_seconds = min(polling_interval * _POLL_BACKOFF_FACTOR ** poll_attempt, max_wait_seconds, timeout - time_elapsed)
+            poll_attempt += 1
+            if mail is not None:
+                log.info(f"Waiting up to {wait_seconds:.1f}s for new mail before next poll for {email_address}...")
                 try:
-                    log.debug(f"Logging out from IMAP server ({email_address}).")
-                    mail.logout()
-                except Exception as e_logout:
-                    log.error(f"Error during IMAP logout for {email_address}: {e_logout}")
-            mail = None # Ensure mail is None for next loop iteration if logout failed or connection error
-        
-        # Wait before retrying or break if timeout is near
-        time_elapsed = time.time() - start_time
-        if time_elapsed < timeout - polling_interval:
-            log.info(f"Waiting {polling_interval}s before next poll for {email_address}...")
-            time.sleep(polling_interval)
-        elif time_elapsed < timeout:
-            log.info(f"Timeout for {email_address} nearly reached ({timeout - time_elapsed:.1f}s remaining), proceeding to final check or exit.")
-        else: # Timeout reached or exceeded
-            log.info(f"Timeout reached for {email_address} while waiting for email from '{sender}'.")
-            break
-
-    raise TimeoutError(f"Could not find 2FA email from {sender} for {email_address} within {timeout} seconds after multiple polls.")
\ No newline at end of file
+                    wait_for_new_mail(mail, wait_seconds)
+                except (imaplib.IMAP4.error, socket.error) as e:
+                    log.warning(f"IMAP IDLE failed for {email_address}: {e}. Will reconnect on next poll.")
+                    _logout(mail, email_address)
+                    mail = None
+            else:
+                log.info(f"Waiting {wait_seconds:.1f}s before next poll for {email_address}...")
+                time.sleep(wait_seconds)
+    finally:
+        _logout(mail, email_address)
+
+    raise TimeoutError(f"Could not find 2FA email from {sender} for {email_address} within {timeout} seconds after multiple polls.")
@@ -1,12 +1,233 @@
-from playwright.sync_api import sync_playwright, Browser, Page, Playwright
-from bs4 import BeautifulSoup
+from playwright.sync_api import sync_playwright, Browser, Page, Playwright, TimeoutError as PlaywrightTimeoutError
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from urllib.parse import urljoin, urlparse, quote_plus # Added quote_plus for URL encoding keywords
 import re # For identify_page_type
+import functools
+import datetime
+import threading
+import imaplib
+import email
+import email.policy
+from email.parser import BytesHeaderParser
+from html.parser import HTMLParser
 from .logger import log
 # from .authenticator import get_2fa_code
 from .security import decrypt
+from .authenticator import find_code_fast, imap_date, wait_for_new_mail
 import time
-# import logging
+import logging
+
+_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Resource types aborted when block_assets is on; none of them is needed to log in or scrape listings
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+# Resolves once no dialog/modal overlay is rendered, so Escape dismissals wait only as long as the close animation
+_NO_OPEN_DIALOG_JS = """() => ![...document.querySelectorAll('[role="dialog"], [aria-modal="true"]')]
+    .some(el => el.checkVisibility ? el.checkVisibility() : el.getClientRects().length > 0)"""
+
+# True once neither the URL nor the rendered page text mentions a captcha. innerText, unlike textContent,
+# leaves out script/style contents and hidden nodes, which may mention captchas on the pages that follow.
+_CAPTCHA_GONE_JS = "() => !/captcha/i.test(location.href) && !/captcha/i.test(document.body ? document.body.innerText : '')"
+
+# Phrase that marks the 2FA method selection page, and the wait for the page to move past it
+_METHOD_SELECTION_TEXT = "where should we send your verification code"
+_METHOD_SELECTION_LEFT_JS = "phrase => !(document.body ? document.body.innerText : '').toLowerCase().includes(phrase)"
+
+# Upper bounds (seconds) for the waits a profile can tune under 'timings'. Every one of these waits ends
+# as soon as its condition is met, so they only matter when something is slow or needs a human.
+_DEFAULT_TIMINGS = {
+    'manual_2fa_wait': 120, # Entering the 2FA code by hand
+    'captcha_wait': 180, # Solving a captcha by hand
+    'email_arrival': 10, # For the verification email, before the first search
+    'email_retry': 15, # For a late verification email, before the broader search
+    'email_code_timeout': 90, # For the whole background IMAP lookup once the code field is ready
+}
+
+# Resolves once the page has left a login step: the URL changed, or none of the step's inputs is visible any more
+_STEP_LEFT_JS = """([url, selector]) => location.href !== url || ![...document.querySelectorAll(selector)]
+    .some(el => el.checkVisibility ? el.checkVisibility() : el.getClientRects().length > 0)"""
+
+# Text of the first element a locator matches, or null; evaluate_all does not wait for a match to appear
+_FIRST_TEXT_JS = "elements => elements.length ? elements[0].textContent : null"
+
+# How long a body-text read stays valid for the same URL; covers identify_page_type plus the handler it dispatches to
+_BODY_TEXT_TTL_SECONDS = 2.0
+
+# One pass over the (lowercased) page text finds every captcha indicator; the group name identifies the type
+_CAPTCHA_TYPE_RE = re.compile(
+    r"(?P<image>select all images|choose all)|(?P<text>enter the characters)|(?P<recaptcha>recaptcha)|(?P<human>prove you are human)"
+)
+
+# Confirms a generic text input is on a PIN page; "password" is included as PIN steps often reuse password fields
+_PIN_PAGE_TEXT_RE = re.compile(r"pin|personal|password")
+
+# Verification code extraction (email fallback reader and page scan), compiled once at import
+_EMAIL_SEARCH_CRITERIA = (
+    '(FROM "amazon" SUBJECT "verification")',
+    '(FROM "amazon" SUBJECT "code")',
+    '(FROM "amazon" SUBJECT "Amazon Jobs")',
+    '(SUBJECT "verification code")',
+    '(SUBJECT "Amazon Jobs verification")',
+    '(FROM "no-reply@amazon" SUBJECT "verification")',
+    '(FROM "amazon.com" SUBJECT "code")'
+)
+# All criteria in one SEARCH key: IMAP's OR is binary, so "OR a OR b c" matches a, b or c
+_EMAIL_SEARCH_QUERY = functools.reduce(
+    lambda rest, criteria: f"OR {criteria} {rest}", reversed(_EMAIL_SEARCH_CRITERIA[:-1]), _EMAIL_SEARCH_CRITERIA[-1]
+)
+_EMAIL_FETCH_BATCH = 5 # Newest matching messages fetched per lookup
+_EMAIL_FETCH_PARTS = "(BODY.PEEK[HEADER.FIELDS (SUBJECT FROM DATE MIME-VERSION CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] BODY.PEEK[TEXT])"
+_FETCH_START_RE = re.compile(rb'\d+ \(') # Start of one message's FETCH response, e.g. b'12 (UID 44 BODY[TEXT] {512}'
+_FETCH_UID_RE = re.compile(rb'UID (\d+)')
+_EMAIL_CODE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\b(\d{6})\b',  # 6 digit code (also the only pattern tried on subject lines)
+    r'\b(\d{4})\b',  # 4 digit code
+    r'\b(\d{8})\b',  # 8 digit code
+    r'verification code[:\s]*(\d+)',
+    r'code[:\s]*(\d+)',
+    r'Your.*code.*?(\d+)',
+    r'Enter.*code.*?(\d+)',
+    r'(\d+).*verification'
+))
+# Gmail IMAP settings; the session is reused across 2FA lookups
+_IMAP_SERVER = "imap.gmail.com"
+_IMAP_PORT = 993
+_IMAP_NOOP_AFTER_SECONDS = 25 * 60 # Gmail drops idle sessions after about 30 minutes
+_ANY_CODE_RE = re.compile(r'\b(\d{4,8})\b')
+# Subject/From of an email worth scanning in the broader fallback search
+_CANDIDATE_EMAIL_RE = re.compile(r"amazon|verif|code|passcode|otp\b", re.IGNORECASE)
+_PAGE_CODE_PATTERNS = (
+    re.compile(r'\b(\d{6})\b'),
+    re.compile(r'\b(\d{4})\b'),
+    re.compile(r'\b(\d{8})\b')
+)
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collects the text of an HTML document, with entities decoded and <script>/<style> contents dropped."""
+
+    _SKIPPED_TAGS = ("script", "style")
+
+    def __init__(self):
+        super().__init__() # convert_charrefs=True decodes entities such as &nbsp; in the text
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+def _html_to_text(html_body: str) -> str:
+    """Returns the visible text of an HTML email body; tags are replaced by spaces so words do not run together."""
+    extractor = _HTMLTextExtractor()
+    extractor.feed(html_body)
+    extractor.close()
+    return " ".join(extractor.parts)
+
+# Header-only parser with the modern policy, so RFC 2047 encoded subjects come back decoded
+_HEADER_PARSER = BytesHeaderParser(policy=email.policy.default)
+
+def _first_code(patterns, text: str) -> str:
+    """
+    Returns the first 4-8 digit match of the first pattern that has one, or None.
+    Matches are taken lazily with finditer, so scanning stops at the first usable code
+    instead of collecting every number in the text.
+    """
+    for pattern in patterns:
+        for match in pattern.finditer(text):
+            code = match.group(1)
+            if 4 <= len(code) <= 8:
+                return code
+    return None
+
+# Job search form fields on Amazon, each resolved in one query (see BrowserActor._first_visible)
+_SEARCH_INPUT_SELECTOR = ", ".join([
+    'input[placeholder*="Search"]',
+    'input[placeholder*="job"]',
+    'input[type="search"]',
+    '#search-jobs'
+])
+_LOCATION_INPUT_SELECTOR = ", ".join([
+    'input[placeholder*="location"]',
+    'input[placeholder*="postcode"]',
+    'input[placeholder*="city"]',
+    'input[aria-label*="location"]' # Added for robustness
+])
+_SEARCH_BUTTON_NAME_RE = re.compile(r"search", re.IGNORECASE)
+
+# Reads every job card in one round-trip: for each card, whether it is visible, and for each named field
+# selector the first matching element's text, href and visibility (null when the card has no match)
+_JOB_CARDS_JS = """(cards, fields) => {
+    // querySelector only understands plain CSS; null tells the caller to use Playwright locators instead
+    for (const selector of Object.values(fields)) {
+        if (!selector) continue;
+        try { document.createDocumentFragment().querySelector(selector); } catch (e) { return null; }
+    }
+    const isVisible = el => el.checkVisibility ? el.checkVisibility() : el.getClientRects().length > 0;
+    return cards.map(card => {
+        const values = {};
+        for (const [name, selector] of Object.entries(fields)) {
+            const el = selector ? card.querySelector(selector) : null;
+            values[name] = el ? {text: (el.textContent || '').trim(), href: el.getAttribute('href'), visible: isVisible(el)} : null;
+        }
+        return {visible: isVisible(card), fields: values};
+    });
+}"""
+
+# Selector unions for the login flow: each string is resolved in one query (see BrowserActor._first_visible).
+# Where a generic fallback exists it is a separate union, tried only when nothing more specific is visible.
+# Buttons and links are matched by accessible role and name (case-insensitive) via Page.get_by_role.
+_SIGN_IN_NAME_RE = re.compile(r"sign in|login", re.IGNORECASE)
+_SIGN_OUT_NAME_RE = re.compile(r"sign out|log out|logout", re.IGNORECASE)
+_LOGIN_HREF_SELECTOR = "[href*='signin'], [href*='login']"
+# [label, href] of a link or button, for logging which one is clicked
+_LINK_LABEL_JS = "el => [el.innerText || el.getAttribute('aria-label') || '', el.getAttribute('href') || '']"
+_GENERIC_TEXT_INPUT_SELECTOR = 'input[type="text"], input:not([type])'
+_SUBMIT_SELECTOR = 'input[type="submit"], button[type="submit"]'
+_EMAIL_INPUT_SELECTOR = ", ".join([
+    'input[type="email"]',
+    'input[name="email"]',
+    '#ap_email',
+    'input[name="username"]',
+    'input[placeholder*="email" i]',
+    'input[placeholder*="mobile" i]',
+    'input[id*="email"]',
+    'input[class*="email"]'
+])
+_EMAIL_NEXT_NAME_RE = re.compile(r"next|continue", re.IGNORECASE)
+_EMAIL_NEXT_SELECTOR = ", ".join([
+    '#continue',
+    'button[class*="continue"]',
+    'button[id*="continue"]',
+    'button[id*="next"]'
+])
+_PIN_INPUT_SELECTOR = ", ".join([
+    'input[placeholder*="pin" i]',
+    'input[name*="pin"]',
+    'input[id*="pin"]',
+    'input[type="password"]',
+    'input[class*="pin"]'
+])
+_PIN_NEXT_NAME_RE = re.compile(r"next|continue|sign in", re.IGNORECASE) # "Sign In" is common on PIN/Password pages
+_EMAIL_OPTION_RADIO_SELECTOR = 'input[type="radio"][value*="email"]'
+_EMAIL_OPTION_NAME_RE = re.compile(r"email verification", re.IGNORECASE)
+_EMAIL_OPTION_SELECTOR = 'input[id*="email"], label:has-text("Email")'
+_SEND_CODE_NAME_RE = re.compile(r"send (verification )?code|continue|next", re.IGNORECASE)
+_CODE_INPUT_SELECTOR = ", ".join([
+    'input[placeholder*="verification"]',
+    'input[placeholder*="code"]',
+    'input[name*="code"]',
+    'input[id*="code"]'
+])
+_NEXT_BUTTON_NAME_RE = re.compile(r"next|continue|verify", re.IGNORECASE)
 
 class BrowserActor:
     """Manages all browser interactions using Playwright."""
@@ -25,6 +246,13 @@ class BrowserActor:
     PAGE_TYPE_LANDING_OR_HOME = "LANDING_OR_HOME"
     PAGE_TYPE_ACCESS_DENIED = "ACCESS_DENIED"
 
+    # The inputs that mark each login step; the auth flow waits for them to disappear (see _wait_for_step_exit)
+    _STEP_INPUT_SELECTORS = {
+        PAGE_TYPE_LOGIN_EMAIL: _EMAIL_INPUT_SELECTOR,
+        PAGE_TYPE_LOGIN_PIN: _PIN_INPUT_SELECTOR,
+        PAGE_TYPE_OTP_VERIFICATION: _CODE_INPUT_SELECTOR,
+    }
+
     def __init__(self, config: dict, master_password: str = None):
         self.config = config
         self.master_password = master_password
@@ -33,13 +261,48 @@ class BrowserActor:
         self.page: Page = None
         self.context = None
         self.session_active = False
+        self._prepared_signatures = None # (page_signatures list, pre-processed copy); see _prepare_signatures
+        # The consent choice persists in the browser context, so once handled the banner is not re-probed
+        self._cookies_dismissed = False
+        self._signed_in = False # Set by login() for the current session; see start_session
+        self._cached_body_text = (None, 0.0, None) # (url, monotonic read time, text); see _read_body_text
+        self._locator_cache = {} # Combined locators for the current page, keyed by selector tuple; see _combined_locator
+        self.timings = config.get('timings', {})
+        self._secrets = {} # Decrypted config secrets by ciphertext, for the current session; see _decrypt_secret
+        self._imap = None # Cached IMAP session for 2FA emails; see _imap_session
+        self._imap_last_used = 0.0
+        self._imap_account = None # Address the cached session is logged in as
+        # IMAP objects are not thread-safe: the 2FA lookup runs on a worker thread and close_session on this one
+        self._imap_lock = threading.RLock()
+        self._2fa_lookup = None # (executor, cancel event) of the latest background 2FA email lookup
+        # Amazon navigation targets, derived once from the config
+        self._home_url = config.get('job_site_url')
+        self._job_search_url = self._home_url.rstrip('/') + '/app#/jobSearch' if self._home_url else None
         self.page_type_handlers = {
             self.PAGE_TYPE_COOKIE_MODAL: self._handle_cookie_modal_generic,
             # self.PAGE_TYPE_CAPTCHA: self.handle_captcha, # Example for future
         }
 
+    def _timing(self, name: str) -> float:
+        """Returns the wait bound in seconds for name, from the profile's 'timings' or _DEFAULT_TIMINGS."""
+        return self.timings.get(name, _DEFAULT_TIMINGS[name])
+
+    def _decrypt_secret(self, encrypted: str) -> str:
+        """
+        Decrypts a config secret once per session, since decrypt() runs a deliberately slow KDF on every call.
+        close_session() drops the plaintexts again.
+        """
+        secret = self._secrets.get(encrypted)
+        if secret is None:
+            secret = decrypt(encrypted, self.master_password)
+            self._secrets[encrypted] = secret
+        return secret
+
     def _handle_cookie_modal_generic(self) -> bool:
-        log.info("Checking for generic cookie modal...")
+        if self._cookies_dismissed:
+            log.debug("Cookie modal already handled in this browser context; skipping.")
+            return False
+        log.debug("Checking for generic cookie modal...")
         job_site_type = self.config.get('job_site_type', 'amazon')
         site_config_name = f"{job_site_type}_config"
 
@@ -53,115 +316,232 @@ class BrowserActor:
             log.debug(f"No 'cookie_modal_selectors' defined for site_type '{job_site_type}'.")
             return False # No selectors, no action
 
-        for selector in cookie_selectors:
+        element = self._visible_match(cookie_selectors)
+        if element is None:
+            log.debug("No configured cookie modal elements found or handled by generic handler.")
+            return False
+        try:
+            log.info("Found and clicking cookie modal element.")
+            element.click(timeout=3000)
+        except Exception as e:
+            log.debug(f"Cookie modal click failed: {e}")
+            return False
+        self._cookies_dismissed = True
+        try:
+            element.wait_for(state="hidden", timeout=2000) # Returns as soon as the banner is gone
+        except Exception:
+            log.debug("Cookie modal element still visible after clicking.")
+        log.info("Cookie modal handled by generic handler.")
+        return True
+
+    def _combined_locator(self, selectors: list):
+        """
+        Combines configured selectors into one locator with Locator.or_(), so they resolve in a single query.
+        Used instead of a CSS union because config selectors may use any Playwright selector syntax.
+        Locators stay valid across navigations, so each chain is built once per page and reused.
+        """
+        key = tuple(selectors) # Prepared signatures already hold tuples, which tuple() returns as they are
+        locator = self._locator_cache.get(key)
+        if locator is None:
+            locator = self.page.locator(selectors[0])
+            for selector in selectors[1:]:
+                locator = locator.or_(self.page.locator(selector))
+            self._locator_cache[key] = locator
+        return locator
+
+    def _visible_match(self, selectors: list):
+        """
+        Returns a locator for the first visible element matching any of the selectors, or None.
+        The selectors are queried together through _combined_locator. If that query fails (e.g. one
+        configured selector is malformed), they are queried one by one so the others still count;
+        the ones that fail are logged and left out of the cached combination for this page.
+        """
+        try:
+            element = self._combined_locator(selectors).locator("visible=true").first
+            return element if element.count() > 0 else None
+        except Exception as e:
+            log.debug(f"Combined query failed for selectors {selectors}, checking them one by one: {e}")
+        match, usable = None, []
+        for selector in selectors:
             try:
-                element = self.page.locator(selector).first # Use .first to be safe
-                if element.is_visible(timeout=2000): # Short timeout to check
-                    log.info(f"Found and clicking cookie modal element: {selector}")
-                    element.click(timeout=3000)
-                    self.page.wait_for_timeout(1000) # Wait for action to complete
-                    log.info(f"Cookie modal handled by selector: {selector}")
-                    return True
+                element = self.page.locator(selector).locator("visible=true").first
+                if element.count() > 0 and match is None:
+                    match = element
+                usable.append(selector)
             except Exception as e:
-                log.debug(f"Cookie selector {selector} not found or action failed: {e}")
+                log.warning(f"Ignoring selector '{selector}', which cannot be queried: {e}")
+        if usable and len(usable) < len(selectors):
+            self._locator_cache[tuple(selectors)] = self._combined_locator(usable)
+        return match
+
+    def _any_visible(self, selectors: list) -> bool:
+        """Returns True if any of the selectors matches a visible element, in one round trip instead of one per selector."""
+        if not selectors:
+            return False
+        return self._visible_match(selectors) is not None
+
+    def _button(self, name_re):
+        """Locator for buttons (including submit inputs) whose accessible name matches name_re."""
+        return self.page.get_by_role("button", name=name_re)
+
+    def _first_visible(self, *selectors):
+        """
+        Returns a locator for the first visible element matching the given selectors, or None.
+        Each selector (a comma-separated union string, or a Locator such as a get_by_role match)
+        costs a single query; they are tried in order, so a generic fallback only wins when
+        nothing more specific is visible.
+        """
+        for selector in selectors:
+            base = self.page.locator(selector) if isinstance(selector, str) else selector
+            locator = base.locator("visible=true").first
+            if locator.count() > 0:
+                return locator
+        return None
+
+    def _click_first(self, *selectors) -> bool:
+        """Clicks the first visible, enabled element from _first_visible and waits for the resulting page load."""
+        for selector in selectors:
+            locator = self._first_visible(selector)
+            if locator is None or not locator.is_enabled():
                 continue
-        log.info("No configured cookie modal elements found or handled by generic handler.")
+            locator.click(timeout=3000)
+            self.page.wait_for_load_state('domcontentloaded', timeout=7000)
+            return True
         return False
 
+    def _ensure_browser(self):
+        """
+        Starts Playwright and launches Chromium on first use; later sessions of this actor reuse them.
+        Playwright's sync API is bound to the thread that started it, so the browser is kept per actor
+        (one per bot thread) rather than shared across the process.
+        """
+        if self.playwright is None:
+            self.playwright = sync_playwright().start()
+        if self.config.get('browser_user_data_dir'):
+            return # Persistent contexts are launched directly in start_session
+        if self.browser is None or not self.browser.is_connected():
+            log.info("Launching browser...")
+            self.browser = self.playwright.chromium.launch(
+                headless=self.config.get('headless', False),
+                args=self.config.get('browser_args', [])
+            )
+
     def start_session(self) -> bool:
         """Start browser session with proper popup handling."""
         try:
             log.info("Starting browser session...")
-            
-            self.playwright = sync_playwright().start()
-            
-            # Launch browser
-            browser = self.playwright.chromium.launch(
-                headless=self.config.get('headless', False)
-            )
-            
-            # Create context with location permission denied (prevents location dialog)
-            self.context = browser.new_context(
-                permissions=[],  # No permissions granted
-                geolocation=None,  # No location access
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
+            self._ensure_browser()
+            # Even a persistent profile's Amazon session may have expired since the last check; login() re-checks it
+            self._signed_in = False
+
+            user_data_dir = self.config.get('browser_user_data_dir')
+            if user_data_dir:
+                # Persistent profile: cookies (and so the Amazon login) survive between sessions and restarts
+                if self.context is None:
+                    self.context = self.playwright.chromium.launch_persistent_context(
+                        user_data_dir,
+                        headless=self.config.get('headless', False),
+                        args=self.config.get('browser_args', []),
+                        permissions=[],
+                        geolocation=None,
+                        user_agent=_USER_AGENT
+                    )
+                    self._block_assets()
+            else:
+                # A fresh context has no consent cookies yet
+                self._cookies_dismissed = False
+                # Create context with location permission denied (prevents location dialog)
+                self.context = self.browser.new_context(
+                    permissions=[],  # No permissions granted
+                    geolocation=None,  # No location access
+                    user_agent=_USER_AGENT
+                )
+                self._block_assets()
             
             self.page = self.context.new_page()
-            self.browser = browser
+            self._locator_cache = {}
+            self.session_active = True
             
             log.info("Browser session started successfully")
             return True
             
         except Exception as e:
             log.error(f"Failed to start browser session: {e}")
+            self.close_session() # Drop a possibly crashed browser so the next attempt relaunches it
             return False
 
+    def _block_assets(self):
+        """Aborts image, font and media requests on the current context unless the profile sets block_assets: false."""
+        if self.config.get('block_assets', True):
+            self.context.route("**/*", self._route_asset)
+
+    @staticmethod
+    def _route_asset(route):
+        request = route.request
+        # Captcha challenges are images the user has to see to solve them manually
+        if request.resource_type in _BLOCKED_RESOURCE_TYPES and 'captcha' not in request.url.lower():
+            route.abort()
+        else:
+            route.continue_()
+
+    def _dismiss_modal_with_escape(self, timeout: int = 2000):
+        """
+        Presses Escape and waits until no dialog is visible, or until timeout (ms) if one stays open.
+        """
+        self.page.keyboard.press('Escape')
+        try:
+            self.page.wait_for_function(_NO_OPEN_DIALOG_JS, timeout=timeout)
+        except Exception as e:
+            log.debug(f"A dialog is still visible after pressing Escape: {e}")
+
     def handle_popups(self) -> bool:
         """Dismiss any visible modals by sending the Escape key."""
         try:
             log.info("Attempting to dismiss site modals with Escape key...")
-            # Wait a moment for page to load, if necessary before Escape
-            # self.page.wait_for_timeout(1000) # Optional short wait
-            self.page.keyboard.press('Escape')
-            self.page.wait_for_timeout(1000)  # Wait for potential modal to close
+            self._dismiss_modal_with_escape(timeout=1000)
             log.info("Escape key pressed for potential modals.")
             return True # Assume success, as it's a blind key press
         except Exception as e:
             log.error(f"Failed to press Escape key for popups: {e}", exc_info=True)
             return False
 
-    # def handle_cookies(self): # Commented out - Replaced by _handle_cookie_modal_generic and dispatcher
-    #     """Handle cookie consent dialogs."""
-    #     try:
-    #         cookie_selectors = [
-    #             "button:has-text('Accept all')",
-    #             "button:has-text('Accept All')",
-    #             "button:has-text('Accept cookies')",
-    #             "button:has-text('Accept Cookies')",
-    #             "#onetrust-accept-btn-handler",
-    #             "[data-test='accept-cookies']",
-    #             ".cookie-accept",
-    #             "button[id*='accept']"
-    #         ]
-
-    #         for selector in cookie_selectors:
-    #             try:
-    #                 element = self.page.query_selector(selector)
-    #                 if element and element.is_visible():
-    #                     log.info(f"Accepting cookies with: {selector}")
-    #                     element.click()
-    #                     self.page.wait_for_timeout(1000)
-    #                     return True
-    #             except:
-    #                 continue
-
-    #     except Exception as e:
-    #         log.warning(f"Cookie handling failed: {e}")
-
-    #     return False
+    def _try_dismiss_popups_inline(self, page=None):
+        """
+        'domcontentloaded' listener: clicks the cookie banner while navigation is still settling.
+        Never raises, as it runs inside Playwright's event dispatch; identify_page_type() remains the backup sweep.
+        """
+        if self._cookies_dismissed:
+            return
+        try:
+            self._handle_cookie_modal_generic()
+        except Exception as e:
+            log.debug(f"Inline cookie dismissal failed: {e}")
 
     def navigate_to_job_search(self) -> bool: # Amazon specific navigation
         """Navigate to the Amazon job search area."""
         try:
             # Amazon Jobs UK loads on main page first
-            job_site_url = self.config.get('job_site_url')
+            job_site_url = self._home_url
             if not job_site_url:
                 log.error("job_site_url not found in config for Amazon navigation.")
                 return False
             log.info(f"Navigating to Amazon main site: {job_site_url}")
             
-            self.page.goto(job_site_url, wait_until="domcontentloaded", timeout=10000)
-            
-            # Handle popups first (Amazon specific)
-            if not self.handle_popups(): # This now only presses Escape
-                log.warning("Amazon modal dismissal (Escape key) had issues or failed, continuing...")
-            
-            # Navigate to actual job search page
-            target_url = job_site_url.rstrip('/') + '/app#/jobSearch'
-            log.info(f"Navigating to Amazon job search page: {target_url}")
-            self.page.goto(target_url, wait_until="domcontentloaded", timeout=10000)
-            self.page.wait_for_load_state('domcontentloaded', timeout=5000)
+            # Dismiss the cookie banner as each document loads instead of in a separate pass afterwards
+            self.page.on("domcontentloaded", self._try_dismiss_popups_inline)
+            try:
+                self.page.goto(job_site_url, wait_until="domcontentloaded", timeout=10000)
+                
+                # Handle popups first (Amazon specific)
+                if not self.handle_popups(): # This now only presses Escape
+                    log.warning("Amazon modal dismissal (Escape key) had issues or failed, continuing...")
+                
+                # Navigate to actual job search page
+                target_url = self._job_search_url
+                log.info(f"Navigating to Amazon job search page: {target_url}")
+                self.page.goto(target_url, wait_until="domcontentloaded", timeout=10000)
+            finally:
+                self.page.remove_listener("domcontentloaded", self._try_dismiss_popups_inline)
 
             page_type = self.identify_page_type()
             expected_types = [self.PAGE_TYPE_SEARCH_RESULTS, self.PAGE_TYPE_LANDING_OR_HOME, self.PAGE_TYPE_UNKNOWN]
@@ -175,8 +555,7 @@ class BrowserActor:
             # NO explicit self.handle_cookies() call here anymore.
             
             log.info("Dismissing potential job alerts modal on Amazon job search page (second pass)...")
-            self.page.keyboard.press('Escape')
-            self.page.wait_for_timeout(2000) # Adjusted wait as per plan
+            self._dismiss_modal_with_escape()
             
             return True
             
@@ -187,6 +566,9 @@ class BrowserActor:
     def login(self) -> bool:
         """Attempt to login to Amazon account with multi-step authentication."""
         try:
+            if self._signed_in:
+                log.info("Already signed in to Amazon in this browser context; skipping login.")
+                return True
             log.info("Starting multi-step Amazon login process...")
             
             # Step 0: First handle any blocking dialogs - Cookie handling is now done by dispatcher at start of run_job_search_session
@@ -194,55 +576,36 @@ class BrowserActor:
             
             # Dismiss job alerts modal that might be blocking
             log.info("Dismissing any job alerts modal before login...")
-            self.page.keyboard.press('Escape')
-            self.page.wait_for_timeout(2000) # Changed from time.sleep(2)
+            self._dismiss_modal_with_escape()
             
             # Step 1: Click hamburger menu to open side panel
             log.info("Opening hamburger menu...")
             self.page.click("body", position={"x": 32, "y": 100})
-            # Wait for side panel to open
-            self.page.wait_for_selector("a:has-text('Sign in')", timeout=5000) # Changed from time.sleep(3)
+            # Wait for side panel to open, on the same options Step 2 picks from, so a "Login" link
+            # (or a "Sign out" one, in an already signed-in context) ends the wait as soon as it renders
+            sign_in_by_role = self.page.get_by_role("link", name=_SIGN_IN_NAME_RE).or_(self._button(_SIGN_IN_NAME_RE))
+            sign_out_by_role = self.page.get_by_role("link", name=_SIGN_OUT_NAME_RE).or_(self._button(_SIGN_OUT_NAME_RE))
+            sign_in_by_role.or_(self.page.locator(_LOGIN_HREF_SELECTOR)).or_(sign_out_by_role) \
+                .locator("visible=true").first.wait_for(state="visible", timeout=5000) # Changed from time.sleep(3)
             
             # Step 2: Look for login/signin options in the side panel
-            login_selectors = [
-                "a:has-text('Sign in')",
-                "a:has-text('Sign In')", 
-                "button:has-text('Sign in')",
-                "button:has-text('Sign In')",
-                "a:has-text('Login')",
-                "button:has-text('Login')",
-                "[href*='signin']",
-                "[href*='login']",
-                "a[href*='amazon'][href*='signin']"
-            ]
-            
-            login_found = False
-            for selector in login_selectors:
-                try:
-                    elements = self.page.query_selector_all(selector)
-                    for element in elements:
-                        if element.is_visible():
-                            text = element.inner_text() or element.get_attribute('aria-label') or ''
-                            href = element.get_attribute('href') or ''
-                            
-                            log.info(f"Found login option: '{text}' -> {href}")
-                            
-                            # Click the first visible login option
-                            element.click()
-                            self.page.wait_for_url("**/ap/signin**", timeout=7000) # Changed from time.sleep(5)
-                            login_found = True
-                            break
-                    
-                    if login_found:
-                        break
-                        
-                except Exception as e:
-                    log.warning(f"Error checking selector {selector}: {e}")
-                    continue
-            
-            if not login_found:
+            login_option = self._first_visible(sign_in_by_role, _LOGIN_HREF_SELECTOR)
+            if login_option is None:
+                if self._first_visible(sign_out_by_role) is not None:
+                    # E.g. a persistent browser_user_data_dir profile that still holds a valid Amazon session
+                    log.info("Side panel offers sign-out; this browser context is already signed in.")
+                    self.page.keyboard.press('Escape') # Close the side panel again
+                    self._signed_in = True
+                    return True
                 log.warning("No login options found in side panel")
                 return False
+
+            text, href = login_option.evaluate(_LINK_LABEL_JS) # One round trip for what is only logged
+            log.info(f"Found login option: '{text}' -> {href}")
+
+            # Click the first visible login option
+            login_option.click()
+            self.page.wait_for_url("**/ap/signin**", timeout=7000) # Changed from time.sleep(5)
             
             # Now we should be on the login flow
             current_page_type = self.identify_page_type()
@@ -251,7 +614,8 @@ class BrowserActor:
             if current_page_type not in [self.PAGE_TYPE_LOGIN_EMAIL, self.PAGE_TYPE_LOGIN_PASSWORD, self.PAGE_TYPE_LOGIN_PIN, self.PAGE_TYPE_OTP_VERIFICATION, self.PAGE_TYPE_CAPTCHA]:
                 log.warning(f"Initial page after sign-in click is '{current_page_type}', expected a login page type. Proceeding to multi-step auth, which will handle the current page.")
 
-            return self.perform_multi_step_authentication()
+            self._signed_in = self.perform_multi_step_authentication()
+            return self._signed_in
                 
         except Exception as e:
             log.error(f"Login failed: {e}", exc_info=True) # Added exc_info for more details
@@ -267,7 +631,7 @@ class BrowserActor:
                 log.error("Encrypted job site password not found in configuration for multi-step auth.")
                 return False
 
-            password = decrypt(encrypted_password, self.master_password)
+            password = self._decrypt_secret(encrypted_password)
             if not password:
                 log.error("Failed to decrypt job site password for multi-step auth.")
                 return False
@@ -284,8 +648,11 @@ class BrowserActor:
 
             while attempt < max_attempts:
                 attempt += 1
+                # No eager body-text read: signatures are decided on URL rules first, so URL-identifiable
+                # steps (including the successful exit) never serialize the page text at all
+                page_url = self.page.url
                 current_page_type = self.identify_page_type()
-                log.info(f"Auth Attempt {attempt}/{max_attempts}: Current page type identified as '{current_page_type}'. URL: {self.page.url}")
+                log.info(f"Auth Attempt {attempt}/{max_attempts}: Current page type identified as '{current_page_type}'. URL: {page_url}")
 
                 if current_page_type == previous_page_type_for_stuck_detection and \
                    current_page_type != self.PAGE_TYPE_UNKNOWN: # Avoid getting stuck on UNKNOWN if signatures are missing
@@ -301,24 +668,24 @@ class BrowserActor:
 
                 previous_page_type_for_stuck_detection = current_page_type
 
-                action_taken_this_step = False
+                # Each handled step is followed by one waiter that resolves when the page leaves that step,
+                # so the next identification happens right after the transition instead of on a polling clock
                 if current_page_type == self.PAGE_TYPE_LOGIN_EMAIL:
                     log.info("Currently on LOGIN_EMAIL page. Attempting to handle email entry.")
                     if not self.handle_email_entry(): return False
-                    action_taken_this_step = True
+                    self._wait_for_step_exit(page_url, current_page_type)
                 elif current_page_type == self.PAGE_TYPE_LOGIN_PIN:
                     log.info("Currently on LOGIN_PIN page. Attempting to handle PIN entry.")
                     if not self.handle_pin_entry(password): return False
-                    action_taken_this_step = True
+                    self._wait_for_step_exit(page_url, current_page_type)
                 elif current_page_type == self.PAGE_TYPE_OTP_VERIFICATION:
                     log.info("Currently on OTP_VERIFICATION page. Attempting to handle 2FA code entry/selection.")
                     # This might internally handle method selection then code entry.
                     if not self.handle_2fa_code_entry(): return False
-                    action_taken_this_step = True
+                    self._wait_for_step_exit(page_url, current_page_type)
                 elif current_page_type == self.PAGE_TYPE_CAPTCHA:
                     log.info("Currently on CAPTCHA page. Attempting to handle CAPTCHA.")
-                    if not self.handle_captcha(): return False
-                    action_taken_this_step = True
+                    if not self.handle_captcha(): return False # Already waits until the captcha is solved
                 elif current_page_type == self.PAGE_TYPE_SEARCH_RESULTS or \
                      current_page_type == self.PAGE_TYPE_LANDING_OR_HOME:
                     log.info(f"Authentication successful: Landed on page type '{current_page_type}'.")
@@ -331,24 +698,11 @@ class BrowserActor:
                     if page_type_retry_count.get(self.PAGE_TYPE_UNKNOWN, 0) >= 3:
                          log.error("Too many consecutive UNKNOWN page types. Authentication failed.")
                          return False
-                    self.page.wait_for_timeout(5000) # Wait before next poll if unknown
-                    action_taken_this_step = True # Consumed an attempt by waiting
+                    self._wait_for_navigation_from(page_url) # Wait before next poll if unknown
                 else: # An unexpected but known page type encountered
                     log.warning(f"Unexpected page type '{current_page_type}' during auth flow (attempt {attempt}). Waiting.")
                     self.log_current_page_details()
-                    self.page.wait_for_timeout(5000) # Wait
-                    action_taken_this_step = True # Consumed an attempt
-
-                # If an action was taken (handler called or waited for UNKNOWN),
-                # a page transition is expected. We might not need an additional generic wait.
-                # If no specific action was taken (e.g. unexpected known page type), a small wait is good.
-                if action_taken_this_step and current_page_type not in [self.PAGE_TYPE_SEARCH_RESULTS, self.PAGE_TYPE_LANDING_OR_HOME]:
-                     log.debug(f"Action taken for {current_page_type}, will re-identify page type in next iteration.")
-                     # self.page.wait_for_timeout(1000) # Optional short wait for page to settle after action
-                elif not action_taken_this_step: # Should not happen if all types are handled
-                     log.error(f"No action defined for page type {current_page_type}. Auth flow stuck.")
-                     return False
-
+                    self._wait_for_navigation_from(page_url) # Wait
 
             log.error(f"Authentication failed after {max_attempts} attempts (exceeded max attempts).")
             return False
@@ -357,7 +711,82 @@ class BrowserActor:
             log.error(f"An unexpected error occurred in perform_multi_step_authentication: {e}", exc_info=True)
             return False
 
+    def _wait_for_step_exit(self, url: str, page_type: str, timeout: int = 20000):
+        """
+        Waits until the page has left the login step page_type was identified on at url: the URL changes
+        or the step's inputs are no longer visible. On timeout the auth loop simply re-identifies the page,
+        and its stuck detection ends the flow if the step keeps repeating.
+        """
+        try:
+            self.page.wait_for_function(_STEP_LEFT_JS, arg=[url, self._STEP_INPUT_SELECTORS[page_type]], timeout=timeout)
+            self.page.wait_for_load_state('domcontentloaded', timeout=timeout) # The next step's document, if one was loaded
+        except Exception:
+            log.debug(f"Page still looks like {page_type} after {timeout}ms.")
+
+    def _wait_for_navigation_from(self, url: str, timeout: int = 5000):
+        """
+        Waits until the page navigates away from url (including hash/history changes), or timeout (ms).
+        Replaces a fixed pause before re-identifying an unrecognised page: a page that is moving on
+        is re-checked immediately, and one that stays put costs no more than the old fixed wait.
+        """
+        try:
+            self.page.wait_for_url(lambda new_url: new_url != url, timeout=timeout)
+        except Exception:
+            log.debug(f"Page stayed on {url} for {timeout}ms.")
+
+    def _read_body_text(self, timeout: int = 1000) -> str:
+        """
+        Returns the lowercased text content of the page body, or None if it could not be read.
+        A read from the same URL within _BODY_TEXT_TTL_SECONDS is reused, so page identification
+        and the step handler that follows it share one serialization of the page text
+        (identify_page_type() clears the cache, so it never sees text from before an action).
+        """
+        url = self.page.url
+        cached_url, read_at, cached_text = self._cached_body_text
+        if cached_url == url and time.monotonic() - read_at < _BODY_TEXT_TTL_SECONDS:
+            return cached_text
+        try:
+            text = (self.page.locator('body').text_content(timeout=timeout) or "").lower()
+        except Exception as e:
+            log.debug(f"Could not read page body text: {e}")
+            return None
+        self._cached_body_text = (url, time.monotonic(), text)
+        return text
+
+    def _prepare_signatures(self, page_signatures: list) -> list:
+        """
+        Returns page_signatures with modal signatures first, their URL regexes compiled and their
+        URL/text rules lowercased. The result is cached for as long as the config holds the same list.
+        """
+        if self._prepared_signatures is not None and self._prepared_signatures[0] is page_signatures:
+            return self._prepared_signatures[1]
+
+        prepared = []
+        for signature in page_signatures:
+            # A rule is None when the signature does not define it; a defined but empty rule still counts
+            prepared.append({
+                'page_type': signature.get('page_type', self.PAGE_TYPE_UNKNOWN),
+                'is_modal': signature.get('is_modal', False),
+                'url_matches': re.compile(signature['url_matches']) if 'url_matches' in signature else None,
+                'url_contains': tuple(sub_str.lower() for sub_str in signature['url_contains']) if 'url_contains' in signature else None,
+                'url_query_param_exists': tuple(signature['url_query_param_exists']) if 'url_query_param_exists' in signature else None,
+                'element_exists': tuple(signature['element_exists']) if 'element_exists' in signature else None,
+                'text_contains': tuple(text_snippet.lower() for text_snippet in signature['text_contains']) if 'text_contains' in signature else None,
+                'element_has_text': tuple((item['selector'], item['text'].lower()) for item in signature['element_has_text']) if 'element_has_text' in signature else None,
+            })
+        # 1. Check Modals First, 2. then Regular Pages (the sort is stable, so configured order is kept within each group)
+        prepared.sort(key=lambda signature: not signature['is_modal'])
+        self._prepared_signatures = (page_signatures, prepared)
+        return prepared
+
     def identify_page_type(self, default_timeout: int = 1000) -> str:
+        """
+        Matches the current page against the configured page_signatures.
+        The body text is read at most once, and only if a signature has a text_contains rule.
+        """
+        # Every identification starts from a fresh read; only the handler that acts on its result reuses it
+        self._cached_body_text = (None, 0.0, None)
+        body_text = None
         current_url = ""
         try:
             current_url = self.page.url.lower()
@@ -383,146 +812,75 @@ class BrowserActor:
             log.debug(f"No page_signatures defined for site type '{job_site_type}'.")
             return self.PAGE_TYPE_UNKNOWN
 
-        # Separate modal and page signatures
-        modal_signatures = [s for s in page_signatures if s.get('is_modal', False)]
-        regular_page_signatures = [s for s in page_signatures if not s.get('is_modal', False)]
-
-        # 1. Check Modals First
-        for signature in modal_signatures:
-            page_type = signature.get('page_type', self.PAGE_TYPE_UNKNOWN)
-            rules_matched = 0
+        # Signatures are classified (modal vs page) and pre-processed once per config, not on every call.
+        # Each one is rejected on its URL rules before any element or text probe goes to the page.
+        query_params = None
+        for signature in self._prepare_signatures(page_signatures):
+            if signature['page_type'] == self.PAGE_TYPE_COOKIE_MODAL and self._cookies_dismissed:
+                continue # Consent persists in this context; its element probe would cost a round trip on every call
             rules_defined = 0
 
             # URL Checks
-            if 'url_matches' in signature:
+            if signature['url_matches'] is not None:
                 rules_defined += 1
-                if re.search(signature['url_matches'], current_url):
-                    rules_matched += 1
-                else: continue
-            if 'url_contains' in signature:
+                if not signature['url_matches'].search(current_url): continue
+            if signature['url_contains'] is not None:
                 rules_defined += 1
-                if all(sub_str.lower() in current_url for sub_str in signature['url_contains']):
-                    rules_matched += 1
-                else: continue
-            if 'url_query_param_exists' in signature:
+                if not all(sub_str in current_url for sub_str in signature['url_contains']): continue
+            if signature['url_query_param_exists'] is not None:
                 rules_defined += 1
-                parsed_url = urlparse(current_url)
-                query_params = set(parsed_url.query.split('&')) if parsed_url.query else set()
-                actual_params = {p.split('=')[0] for p in query_params}
-                if all(param_name in actual_params for param_name in signature['url_query_param_exists']):
-                    rules_matched +=1
-                else: continue
+                if query_params is None:
+                    query = urlparse(current_url).query
+                    query_params = {p.split('=')[0] for p in query.split('&')} if query else set()
+                if not all(param_name in query_params for param_name in signature['url_query_param_exists']): continue
 
             # Element Exists Check
-            if 'element_exists' in signature:
+            if signature['element_exists'] is not None:
                 rules_defined += 1
-                found_element = False
-                for selector in signature['element_exists']:
-                    try:
-                        if self.page.locator(selector).is_visible(timeout=default_timeout):
-                            found_element = True
-                            break
-                    except Exception: continue
-                if found_element: rules_matched += 1
-                else: continue
+                if not self._any_visible(signature['element_exists']): continue
 
             # Text Contains Check
-            if 'text_contains' in signature:
+            if signature['text_contains'] is not None:
                 rules_defined += 1
-                try:
-                    body_text = self.page.locator('body').text_content(timeout=default_timeout).lower()
-                    if all(text_snippet.lower() in body_text for text_snippet in signature['text_contains']):
-                        rules_matched += 1
-                    else: continue
-                except Exception: continue
+                if body_text is None:
+                    body_text = self._read_body_text(default_timeout)
+                if body_text is None or not all(text_snippet in body_text for text_snippet in signature['text_contains']): continue
 
             # Element Has Text Check
-            if 'element_has_text' in signature:
-                rules_defined +=1
-                all_elements_have_text = True
-                for item in signature['element_has_text']:
-                    try:
-                        elem_text = self.page.locator(item['selector']).text_content(timeout=default_timeout)
-                        if item['text'].lower() not in elem_text.lower():
-                            all_elements_have_text = False
-                            break
-                    except Exception:
-                        all_elements_have_text = False
-                        break
-                if all_elements_have_text: rules_matched += 1
-                else: continue
-
-            if rules_defined > 0 and rules_matched == rules_defined:
-                log.info(f"Modal page type detected: {page_type} for {current_url}")
-                return page_type
-
-        # 2. Check Regular Pages if no modal matched
-        for signature in regular_page_signatures:
-            page_type = signature.get('page_type', self.PAGE_TYPE_UNKNOWN)
-            rules_matched = 0
-            rules_defined = 0
-            # URL Checks
-            if 'url_matches' in signature:
-                rules_defined += 1
-                if re.search(signature['url_matches'], current_url): rules_matched += 1
-                else: continue
-            if 'url_contains' in signature:
-                rules_defined += 1
-                if all(sub_str.lower() in current_url for sub_str in signature['url_contains']): rules_matched += 1
-                else: continue
-            if 'url_query_param_exists' in signature:
-                rules_defined += 1
-                parsed_url = urlparse(current_url)
-                query_params = set(parsed_url.query.split('&')) if parsed_url.query else set()
-                actual_params = {p.split('=')[0] for p in query_params}
-                if all(param_name in actual_params for param_name in signature['url_query_param_exists']): rules_matched +=1
-                else: continue
-            # Element Exists
-            if 'element_exists' in signature:
-                rules_defined += 1
-                found_element = False
-                for selector in signature['element_exists']:
-                    try:
-                        if self.page.locator(selector).is_visible(timeout=default_timeout):
-                            found_element = True
-                            break
-                    except Exception: continue
-                if found_element: rules_matched += 1
-                else: continue
-            # Text Contains
-            if 'text_contains' in signature:
+            if signature['element_has_text'] is not None:
                 rules_defined += 1
-                try:
-                    body_text = self.page.locator('body').text_content(timeout=default_timeout).lower()
-                    if all(text_snippet.lower() in body_text for text_snippet in signature['text_contains']): rules_matched += 1
-                    else: continue
-                except Exception: continue
-            # Element Has Text
-            if 'element_has_text' in signature:
-                rules_defined +=1
                 all_elements_have_text = True
-                for item in signature['element_has_text']:
+                for selector, expected_text in signature['element_has_text']:
+                    # One round trip per rule: a missing element comes back as None at once instead of
+                    # waiting out a text_content() timeout, and several matches are not a strict-mode error
                     try:
-                        elem_text = self.page.locator(item['selector']).text_content(timeout=default_timeout)
-                        if item['text'].lower() not in elem_text.lower():
-                            all_elements_have_text = False; break
-                    except Exception: all_elements_have_text = False; break
-                if all_elements_have_text: rules_matched += 1
-                else: continue
-
-            if rules_defined > 0 and rules_matched == rules_defined:
-                log.info(f"Page type detected: {page_type} for {current_url}")
-                return page_type
+                        elem_text = self.page.locator(selector).evaluate_all(_FIRST_TEXT_JS)
+                    except Exception as e:
+                        log.debug(f"element_has_text check failed for selector '{selector}': {e}")
+                        elem_text = None
+                    if elem_text is None or expected_text not in elem_text.lower():
+                        all_elements_have_text = False; break
+                if not all_elements_have_text: continue
+
+            if rules_defined > 0:
+                if signature['is_modal']:
+                    log.info(f"Modal page type detected: {signature['page_type']} for {current_url}")
+                else:
+                    log.info(f"Page type detected: {signature['page_type']} for {current_url}")
+                return signature['page_type']
 
         log.info(f"No specific page type detected for {current_url} using signatures. Returning UNKNOWN.")
         return self.PAGE_TYPE_UNKNOWN
 
     def log_current_page_details(self):
         """Log current page details for debugging."""
+        if not log.isEnabledFor(logging.INFO):
+            return # Skip the page round-trips when the output would be discarded
         try:
             current_url = self.page.url
             page_title = self.page.title()
-            page_text_snippet = self.page.inner_text('body')[:500]  # First 500 chars
+            # Sliced in the browser so only the first 500 chars cross the wire, not the whole body text
+            page_text_snippet = self.page.evaluate("() => document.body ? document.body.innerText.slice(0, 500) : ''")
             
             log.info("=== CURRENT PAGE DETAILS ===")
             log.info(f"URL: {current_url}")
@@ -538,73 +896,31 @@ class BrowserActor:
         try:
             log.info("Handling email entry step...")
             
-            # Wait for page to load
-            self.page.wait_for_load_state('domcontentloaded', timeout=5000) # Changed from time.sleep(3)
-            
-            # Look for email input field
-            email_selectors = [
-                'input[type="email"]', 
-                'input[name="email"]', 
-                '#ap_email',
-                'input[name="username"]',
-                'input[placeholder*="email"]',
-                'input[placeholder*="Email"]',
-                'input[placeholder*="mobile"]',
-                'input[id*="email"]',
-                'input[class*="email"]',
-                'input[type="text"]',
-                'input:not([type])'
-            ]
-            
-            email_filled = False
             job_site_username = self.config.get('job_site_username')
             if not job_site_username:
                 log.error("job_site_username not found in config for email entry")
                 return False
 
-            for selector in email_selectors:
-                try:
-                    locator = self.page.locator(selector).first
-                    if locator.is_visible(timeout=1000): # Short timeout for check
-                        locator.fill(job_site_username)
-                        log.info(f"Email filled with {selector}: {job_site_username}")
-                        email_filled = True
-                        break
-                except Exception: # TimeoutError if not visible/found or other Playwright errors
-                    log.debug(f"Email field selector {selector} not found or action failed.")
-                    continue
-            
-            if not email_filled:
+            # Look for email input field
+            email_field = self._first_visible(_EMAIL_INPUT_SELECTOR, _GENERIC_TEXT_INPUT_SELECTOR)
+            if email_field is None:
                 log.error("No email field found or filled")
                 return False
+            try:
+                email_field.fill(job_site_username)
+                log.info(f"Email filled: {job_site_username}")
+            except Exception as e:
+                log.error(f"Failed to fill email field: {e}")
+                return False
             
             # Click next/continue button
-            next_selectors = [
-                'button:has-text("Next")',
-                'button:has-text("NEXT")',
-                'button:has-text("Continue")',
-                'button:has-text("CONTINUE")',
-                'input[type="submit"]',
-                '#continue',
-                'button[type="submit"]',
-                'button[class*="continue"]',
-                'button[id*="continue"]',
-                'button[id*="next"]'
-            ]
-            
-            next_clicked = False
-            for selector in next_selectors:
-                try:
-                    locator = self.page.locator(selector).first
-                    if locator.is_visible(timeout=1000) and locator.is_enabled(timeout=1000):
-                        locator.click(timeout=3000)
-                        self.page.wait_for_load_state('domcontentloaded', timeout=7000)
-                        log.info(f"Clicked next button with selector: {selector}")
-                        next_clicked = True
-                        break
-                except Exception: # TimeoutError if not visible/found or other Playwright errors
-                    log.debug(f"Next button selector {selector} not found or action failed.")
-                    continue
+            try:
+                next_clicked = self._click_first(self._button(_EMAIL_NEXT_NAME_RE), _EMAIL_NEXT_SELECTOR, _SUBMIT_SELECTOR)
+                if next_clicked:
+                    log.info("Clicked next button after email entry")
+            except Exception as e: # TimeoutError if the click or load did not complete
+                log.debug(f"Next button click failed after email entry: {e}")
+                next_clicked = False
             
             if not next_clicked:
                 # Try pressing Enter key as alternative
@@ -629,74 +945,34 @@ class BrowserActor:
         try:
             log.info("Handling PIN entry step...")
             
-            # Wait for page to load
-            self.page.wait_for_load_state('domcontentloaded', timeout=5000) # Changed from time.sleep(3)
-            
-            # Look for PIN input field with more specific selectors
-            pin_selectors = [
-                'input[placeholder*="PIN"]',
-                'input[placeholder*="pin"]',
-                'input[name*="pin"]',
-                'input[id*="pin"]',
-                'input[type="password"]',
-                'input[class*="pin"]',
-                # More generic selectors for PIN pages
-                'input[type="text"]',
-                'input:not([type])'
-            ]
-            
-            pin_field_locator = None
-            pin_field_filled = False
-            for selector in pin_selectors:
-                try:
-                    locator = self.page.locator(selector).first
-                    if locator.is_visible(timeout=1000): # Short timeout for check
-                        # Double-check this is actually a PIN field by checking the page context
-                        page_text = self.page.locator('body').text_content(timeout=1000).lower()
-                        if 'pin' in page_text or 'personal' in page_text or 'password' in page_text: # Added password as PIN often reuses password fields
-                            pin_field_locator = locator
-                            log.info(f"Found PIN field with selector: {selector}")
-                            break
-                except Exception: # TimeoutError if not visible/found or other Playwright errors
-                    log.debug(f"PIN field selector {selector} not found or action failed.")
-                    continue
+            # Look for PIN input field, falling back to generic text inputs on PIN pages
+            pin_field_locator = self._first_visible(_PIN_INPUT_SELECTOR, _GENERIC_TEXT_INPUT_SELECTOR)
+            if pin_field_locator is not None:
+                # Double-check this is actually a PIN field by checking the page context
+                page_text = self._read_body_text() or "" # Usually still cached from identify_page_type
+                if not _PIN_PAGE_TEXT_RE.search(page_text): # One scan of the text for all three indicators
+                    pin_field_locator = None
             
             if not pin_field_locator:
                 log.error("No PIN field found")
                 return False
+            log.info("Found PIN field")
             
             try:
                 pin_field_locator.fill(password)
                 log.info("PIN filled successfully")
-                pin_field_filled = True
             except Exception as e:
                 log.error(f"Failed to fill PIN: {e}")
                 return False
 
             # Click next button
-            next_selectors = [
-                'button:has-text("Next")',
-                'button:has-text("NEXT")',
-                'button:has-text("Continue")',
-                'button:has-text("Sign In")', # Common on PIN/Password pages
-                'button:has-text("SIGN IN")',
-                'input[type="submit"]',
-                'button[type="submit"]'
-            ]
-            
-            next_clicked = False
-            for selector in next_selectors:
-                try:
-                    locator = self.page.locator(selector).first
-                    if locator.is_visible(timeout=1000) and locator.is_enabled(timeout=1000):
-                        locator.click(timeout=3000)
-                        self.page.wait_for_load_state('domcontentloaded', timeout=7000)
-                        log.info(f"Clicked next button after PIN entry: {selector}")
-                        next_clicked = True
-                        break
-                except Exception: # TimeoutError if not visible/found or other Playwright errors
-                    log.debug(f"Next button (after PIN) selector {selector} not found or action failed.")
-                    continue
+            try:
+                next_clicked = self._click_first(self._button(_PIN_NEXT_NAME_RE), _SUBMIT_SELECTOR)
+                if next_clicked:
+                    log.info("Clicked next button after PIN entry")
+            except Exception as e: # TimeoutError if the click or load did not complete
+                log.debug(f"Next button click failed after PIN entry: {e}")
+                next_clicked = False
             
             if not next_clicked:
                 # Try Enter key as fallback
@@ -721,82 +997,51 @@ class BrowserActor:
         try:
             log.info("Handling verification method selection...")
             
-            # Wait for page to load
-            self.page.wait_for_load_state('domcontentloaded', timeout=5000) # Changed from time.sleep(3)
-            
             # Check if we're actually on the verification method page
+            # Rendered text (innerText) as in the wait below, so hidden templates with the phrase do not count
             page_text = self.page.inner_text('body').lower()
-            if 'where should we send your verification code' not in page_text:
+            if _METHOD_SELECTION_TEXT not in page_text:
                 log.info("Not on verification method page, skipping...")
                 return True
             
-            # Look for email verification option (should be selected by default)
-            email_option_selectors = [
-                'input[type="radio"][value*="email"]',
-                'button:has-text("Email verification")',
-                'input[id*="email"]',
-                'label:has-text("Email")'
-            ]
-            
-            # Try to select email option if not already selected
-            email_selected = False
-            for selector in email_option_selectors:
-                try:
-                    locator = self.page.locator(selector).first
-                    if locator.is_visible(timeout=1000):
-                        if selector.startswith('input[type="radio"]'):
-                            if not locator.is_checked():
-                                locator.check(timeout=2000) # Use .check() for radio buttons
-                                log.info(f"Selected email verification option (radio): {selector}")
-                            else:
-                                log.info(f"Email verification option (radio) already selected: {selector}")
-                        else: # For button or other clickable elements
-                            locator.click(timeout=2000)
-                            log.info(f"Clicked email verification option (button/link): {selector}")
-
-                        email_selected = True
-                        self.page.wait_for_timeout(1000) # Short wait for action to complete
-                        break
-                except Exception: # TimeoutError or other
-                    log.debug(f"Email option selector {selector} not found or action failed.")
-                    continue
+            # Try to select email option if not already selected (should be selected by default)
+            # check()/click() already wait for the action to take effect
+            try:
+                radio = self._first_visible(_EMAIL_OPTION_RADIO_SELECTOR)
+                if radio is not None:
+                    if not radio.is_checked():
+                        radio.check(timeout=2000) # Use .check() for radio buttons
+                        log.info("Selected email verification option (radio)")
+                    else:
+                        log.info("Email verification option (radio) already selected")
+                else:
+                    option = self._first_visible(self._button(_EMAIL_OPTION_NAME_RE).or_(self.page.locator(_EMAIL_OPTION_SELECTOR)))
+                    if option is not None: # For button or other clickable elements
+                        option.click(timeout=2000)
+                        log.info("Clicked email verification option (button/link)")
+            except Exception as e: # TimeoutError or other
+                log.debug(f"Email verification option not found or action failed: {e}")
             
             # Click send verification code button
-            send_selectors = [
-                'button:has-text("Send verification code")',
-                'button:has-text("Send code")',
-                'button:has-text("Continue")',
-                'button:has-text("Next")',
-                'input[type="submit"]'
-            ]
-            
-            send_clicked = False
-            for selector in send_selectors:
-                try:
-                    locator = self.page.locator(selector).first
-                    if locator.is_visible(timeout=1000) and locator.is_enabled(timeout=1000):
-                        locator.click(timeout=3000)
-                        self.page.wait_for_load_state('domcontentloaded', timeout=7000)
-                        log.info(f"Clicked send verification code: {selector}")
-                        send_clicked = True
-                        break
-                except Exception: # TimeoutError or other
-                    log.debug(f"Send code button selector {selector} not found or action failed.")
-                    continue
+            try:
+                send_clicked = self._click_first(self._button(_SEND_CODE_NAME_RE), 'input[type="submit"]')
+                if send_clicked:
+                    log.info("Clicked send verification code")
+            except Exception as e: # TimeoutError or other
+                log.debug(f"Send code button click failed: {e}")
+                send_clicked = False
             
             if not send_clicked:
                 log.warning("Could not find or click send verification code button")
                 return False
             
-            # Wait a bit longer to see if page changes
-            self.page.wait_for_timeout(10000) # Changed from time.sleep(10)
-            
-            # Check if we've moved to the next step
-            new_page_text = self.page.inner_text('body').lower()
-            if 'where should we send your verification code' not in new_page_text:
+            # Wait until the page moves past the method selection instead of a fixed 10s delay
+            try:
+                # Polled rather than re-evaluated on every animation frame
+                self.page.wait_for_function(_METHOD_SELECTION_LEFT_JS, arg=_METHOD_SELECTION_TEXT, polling=250, timeout=15000)
                 log.info("Successfully moved past verification method selection")
                 return True
-            else:
+            except Exception:
                 log.warning("Still on verification method page after clicking send")
                 return False
             
@@ -807,38 +1052,48 @@ class BrowserActor:
 
     def handle_2fa_code_entry(self) -> bool:
         """Handle 2FA verification code entry with manual intervention."""
+        code_future = None
+        executor = None
         try:
             log.info("Handling 2FA verification code entry...")
-
-            code_selectors = [
-                'input[placeholder*="verification"]',
-                'input[placeholder*="code"]',
-                'input[name*="code"]',
-                'input[id*="code"]',
-                'input[type="text"]',
-                'input:not([type])'
-            ]
-
-            code_field_locator = None
-            for selector in code_selectors:
-                try:
-                    locator = self.page.locator(selector).first
-                    if locator.is_visible(timeout=1000):
-                        code_field_locator = locator
-                        log.info(f"Found 2FA code field with selector: {selector}")
-                        break
-                except Exception:
-                    log.debug(f"2FA code field selector {selector} not found or action failed.")
-                    continue
-
-            if not code_field_locator:
-                log.error("No 2FA code field found")
-                return False
+            # Amazon's OTP URLs (/ap/cvf/verify...) do not name the step, so leaving it is detected as a URL change
+            step_url = self.page.url
 
             email_config = self.config.get('email_automation', {})
             if email_config.get('enabled'):
+                # The IMAP lookup never touches the page, so it runs in the background while the code field renders
                 log.info("Attempting automatic 2FA code retrieval...")
-                verification_code = self.get_2fa_code_from_email()
+                # A running future cannot be cancelled, so the worker is told to stop between polls instead
+                cancel_lookup = threading.Event()
+                executor = ThreadPoolExecutor(max_workers=1)
+                self._2fa_lookup = (executor, cancel_lookup)
+                code_future = executor.submit(self.get_2fa_code_from_email, cancel_lookup)
+
+            if code_future is not None:
+                # Only the automatic fill needs the field; on the manual path the user types into it directly
+                try:
+                    self.page.locator(_CODE_INPUT_SELECTOR).or_(self.page.locator(_GENERIC_TEXT_INPUT_SELECTOR)) \
+                        .locator("visible=true").first.wait_for(state="visible", timeout=30000)
+                except Exception:
+                    log.debug("No visible 2FA code field after waiting.")
+                code_field_locator = self._first_visible(_CODE_INPUT_SELECTOR, _GENERIC_TEXT_INPUT_SELECTOR)
+                if not code_field_locator:
+                    log.error("No 2FA code field found")
+                    return False
+                log.info("Found 2FA code field")
+
+                log.info("Waiting for the emailed 2FA code; you can also enter it in the browser yourself meanwhile.")
+                if self._wait_for_code_or_manual_entry(code_future):
+                    log.info("2FA code was entered manually while the email lookup was running.")
+                    return True
+                try:
+                    verification_code = code_future.result(timeout=0)
+                except FutureTimeoutError:
+                    log.warning(f"No 2FA code from email within {self._timing('email_code_timeout')}s.")
+                    verification_code = None
+                except Exception:
+                    # Fallback: try to extract code from page if it's pre-filled or visible (page calls stay on this thread)
+                    verification_code = self.extract_code_from_page()
                 if verification_code:
                     try:
                         code_field_locator.fill(verification_code)
@@ -854,22 +1109,25 @@ class BrowserActor:
 
             log.info("⚠️  MANUAL INTERVENTION REQUIRED: 2FA Code Entry")
             log.info("📧 Please check your email for the verification code")
-            log.info("⏳ You have 120 seconds to:")
+            manual_wait = self._timing('manual_2fa_wait')
+            log.info(f"⏳ You have {manual_wait} seconds to:")
             log.info("   1. Check your email for the Amazon verification code")
             log.info("   2. Enter the code in the browser window")
             log.info("   3. Click Next")
 
-            time.sleep(120)
+            # Driven by navigation events rather than polling; returns as soon as the page leaves the verification step
+            try:
+                self.page.wait_for_url(lambda url: url != step_url, timeout=manual_wait * 1000)
+            except Exception:
+                log.debug("Still on the verification page after the manual 2FA window.")
 
-            current_url = self.page.url
-            if 'verification' not in current_url.lower() and 'code' not in current_url.lower():
+            if self.page.url != step_url:
                 log.info("2FA code appears to have been successfully entered manually!")
                 return True
 
             log.info("Attempting to click 'Next' after manual 2FA period if still on verification page.")
             if self.click_next_button():
-                current_url_after_click = self.page.url
-                if 'verification' not in current_url_after_click.lower() and 'code' not in current_url_after_click.lower():
+                if self.page.url != step_url:
                     log.info("Successfully navigated away from 2FA page after clicking Next.")
                     return True
                 else:
@@ -879,27 +1137,38 @@ class BrowserActor:
         except Exception as e:
             log.error(f"2FA code entry failed: {e}")
             return False
+        finally:
+            if executor is not None:
+                cancel_lookup.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _wait_for_code_or_manual_entry(self, code_future) -> bool:
+        """
+        Waits until the background email lookup finishes, the user completes the 2FA step by hand, or
+        email_code_timeout passes. Returns True if the page navigated away from the URL it had on entry
+        (manual entry won); Amazon's OTP URLs (/ap/cvf/verify...) do not name the step, so only a change
+        of URL counts. The page can only be watched from this thread, so it is watched in short navigation
+        waits between checks of the future. Errors other than a slice timing out (e.g. the page was closed)
+        propagate, since retrying them would fail at once and spin until the deadline.
+        """
+        step_url = self.page.url
+        deadline = time.monotonic() + self._timing('email_code_timeout')
+        while not code_future.done() and time.monotonic() < deadline:
+            try:
+                self.page.wait_for_url(lambda url: url != step_url, timeout=500)
+                return True
+            except PlaywrightTimeoutError:
+                pass # Still on the verification step
+        return self.page.url != step_url
+
     def click_next_button(self):
         """Helper method to click next/continue buttons."""
-        next_selectors = [
-            'button:has-text("Next")',
-            'button:has-text("Continue")',
-            'button:has-text("Verify")',
-            'input[type="submit"]',
-            'button[type="submit"]'
-        ]
-        
-        for selector in next_selectors:
-            try:
-                locator = self.page.locator(selector).first
-                if locator.is_visible(timeout=1000) and locator.is_enabled(timeout=1000): # Short timeouts for check
-                    locator.click(timeout=3000) # Timeout for the click action itself
-                    self.page.wait_for_load_state('domcontentloaded', timeout=7000)
-                    log.info(f"Clicked next button: {selector}")
-                    return True
-            except Exception: # TimeoutError if not visible/found or other Playwright errors
-                log.debug(f"Next button selector {selector} not found or action failed in click_next_button.")
-                continue
+        try:
+            if self._click_first(self._button(_NEXT_BUTTON_NAME_RE), _SUBMIT_SELECTOR):
+                log.info("Clicked next button")
+                return True
+        except Exception as e: # TimeoutError if the click or load did not complete
+            log.debug(f"Next button click failed in click_next_button: {e}")
         
         log.warning("click_next_button: No 'next' button found or all attempts failed.")
         return False
@@ -909,27 +1178,28 @@ class BrowserActor:
         try:
             log.info("Captcha detected - requiring manual intervention")
             
-            # Wait for captcha to load
-            # time.sleep(3) -> Kept for manual intervention as per plan
-            
             # Log what type of captcha we're dealing with
             captcha_info = self.analyze_captcha()
             
             log.info("⚠️  MANUAL INTERVENTION REQUIRED: Captcha Solving")
             log.info(f"🧩 Captcha type detected: {captcha_info}")
-            log.info("⏳ You have 180 seconds (3 minutes) to:")
+            captcha_wait = self._timing('captcha_wait')
+            log.info(f"⏳ You have {captcha_wait} seconds to:")
             log.info("   1. Solve the captcha in the browser window")
             log.info("   2. Click submit/continue")
             log.info("   3. Complete any additional verification steps")
             
-            # Wait for manual captcha solving
-            time.sleep(180)
+            # Wait for manual captcha solving; returns as soon as neither the URL nor the page mentions a captcha.
+            # Checked twice a second rather than on every animation frame, which is plenty for a human solver.
+            try:
+                self.page.wait_for_function(_CAPTCHA_GONE_JS, polling=500, timeout=captcha_wait * 1000)
+                # The login step handlers expect a parsed document and do not wait for one themselves
+                self.page.wait_for_load_state('domcontentloaded', timeout=5000)
+            except Exception:
+                log.debug("Captcha still present after the manual solving window.")
             
             # Check if captcha was solved
-            current_url = self.page.url
-            page_text = self.page.inner_text('body').lower()
-            
-            if 'captcha' not in current_url.lower() and 'captcha' not in page_text:
+            if self.page.evaluate(_CAPTCHA_GONE_JS):
                 log.info("Captcha appears to have been solved!")
                 return True
             
@@ -943,34 +1213,31 @@ class BrowserActor:
     def analyze_captcha(self) -> str:
         """Analyze what type of captcha we're dealing with."""
         try:
-            page_text = self.page.inner_text('body').lower()
+            page_text = self._read_body_text() or "" # Usually still cached from identify_page_type
             
-            # Check for different captcha types
-            if 'select all images' in page_text or 'choose all' in page_text:
+            # Check for different captcha types, in priority order, from a single scan of the text
+            found = {match.lastgroup for match in _CAPTCHA_TYPE_RE.finditer(page_text)}
+            if 'image' in found:
                 return "Image Selection Captcha (e.g., 'Select all beds')"
-            elif 'enter the characters' in page_text:
+            elif 'text' in found:
                 return "Text-based Captcha"
-            elif 'recaptcha' in page_text or self.page.locator('.g-recaptcha').count() > 0: # Check count for locator
-                # Could also use is_visible with a short timeout if the element might be slow to appear
-                # if 'recaptcha' in page_text or self.page.locator('.g-recaptcha').is_visible(timeout=500):
+            elif 'recaptcha' in found or self.page.locator('.g-recaptcha').count() > 0: # Check count for locator
                 return "Google reCAPTCHA"
-            elif 'prove you are human' in page_text:
+            elif 'human' in found:
                 return "Human Verification Challenge"
             else:
                 return "Unknown Captcha Type"
                 
-        except:
+        except Exception as e:
+            log.debug(f"Captcha analysis failed: {e}")
             return "Captcha Detection Error"
 
-    def get_2fa_code_from_email(self) -> str:
-        """Automatically retrieve 2FA verification code from email."""
+    def get_2fa_code_from_email(self, cancel_event: threading.Event = None) -> str:
+        """
+        Automatically retrieve 2FA verification code from email.
+        Once cancel_event is set, the lookup gives up at the next wait for new mail and returns None.
+        """
         try:
-            import imaplib
-            import email
-            from email.header import decode_header
-            import re
-            import time
-            
             log.info("Attempting to retrieve 2FA code from email...")
             
             # Check if email automation is configured
@@ -983,8 +1250,7 @@ class BrowserActor:
             email_address = email_config.get('email_address', self.config.get('job_site_username'))
             
             try:
-                # from .security import decrypt # This is already imported at the top
-                email_password = decrypt(email_config.get('encrypted_app_password'), self.master_password)
+                email_password = self._decrypt_secret(email_config.get('encrypted_app_password'))
                 if not email_password:
                     log.error("Failed to decrypt email app password, or password not found in email_config")
                     return None
@@ -993,149 +1259,182 @@ class BrowserActor:
                 log.error(f"Failed to decrypt email app password: {e}")
                 return None
             
-            # Gmail IMAP settings
-            imap_server = "imap.gmail.com"
-            imap_port = 993
-            
-            # Wait a bit for the email to arrive
-            log.info("Waiting 10 seconds for verification email to arrive...")
-            time.sleep(10)
-            
-            # Connect to email
-            mail = imaplib.IMAP4_SSL(imap_server, imap_port)
-            
-            try:
-                mail.login(email_address, email_password)
-                log.info("Successfully connected to email account")
-                
-                # Select inbox
-                mail.select("inbox")
-                
-                # Search for recent Amazon verification emails
-                search_criteria = [
-                    '(FROM "amazon" SUBJECT "verification")',
-                    '(FROM "amazon" SUBJECT "code")',
-                    '(FROM "amazon" SUBJECT "Amazon Jobs")',
-                    '(SUBJECT "verification code")',
-                    '(SUBJECT "Amazon Jobs verification")',
-                    '(FROM "no-reply@amazon" SUBJECT "verification")',
-                    '(FROM "amazon.com" SUBJECT "code")'
-                ]
-                
-                verification_code = None
+            with self._imap_lock:
+                try:
+                    # The session from the previous lookup is reused when still alive (see _imap_session)
+                    mail = self._imap_session(email_address, email_password)
+
+                    # Wait a bit for the email to arrive; with IMAP IDLE this returns as soon as it does
+                    log.info(f"Waiting up to {self._timing('email_arrival')} seconds for verification email to arrive...")
+                    wait_for_new_mail(mail, self._timing('email_arrival'), cancel_event)
+                    if cancel_event is not None and cancel_event.is_set():
+                        log.debug("2FA email lookup cancelled.")
+                        return None
                 
-                for criteria in search_criteria:
+                    # One UID SEARCH for all criteria, then one FETCH for the newest matches. SINCE keeps the server
+                    # from matching the whole mailbox's history; it is date-only (server time), hence yesterday
+                    since = imap_date(datetime.date.today() - datetime.timedelta(days=1))
+                    verification_code = None
                     try:
-                        # Search for emails from today
-                        status, messages = mail.search(None, criteria)
+                        status, messages = mail.uid('SEARCH', 'SINCE', since, _EMAIL_SEARCH_QUERY)
+                    except (imaplib.IMAP4.abort, OSError) as e:
+                        # The connection itself is gone; reconnect once and search again
+                        log.warning(f"IMAP connection lost while searching for the verification email: {e}")
+                        self._drop_imap()
+                        mail = self._imap_session(email_address, email_password)
+                        status, messages = mail.uid('SEARCH', 'SINCE', since, _EMAIL_SEARCH_QUERY)
+
+                    if status == "OK" and messages[0]:
+                        for raw_headers, raw_text in self._fetch_newest_messages(mail, messages[0].split()):
+                            # Cheapest first: a code in the subject line needs no body scan at all
+                            email_subject = _HEADER_PARSER.parsebytes(raw_headers).get("Subject", "")
+                            log.debug(f"Checking email with subject: {email_subject}")
+                            verification_code = _first_code(_EMAIL_CODE_PATTERNS[:1], email_subject)
+                            if verification_code:
+                                log.info(f"Found verification code in subject: {verification_code}")
+                                break
+
+                            # Usually the text holds exactly one 6-digit number, found without building an email.Message
+                            verification_code = find_code_fast(raw_headers, raw_text)
+                            if verification_code:
+                                log.info(f"Found verification code: {verification_code}")
+                                break
+
+                            # Extract email content
+                            email_message = email.message_from_bytes(raw_headers + raw_text)
+                            email_body = self.extract_email_body(email_message)
                         
-                        if status == "OK" and messages[0]:
-                            # Get the most recent email
-                            email_ids = messages[0].split()
-                            if email_ids:
-                                latest_email_id = email_ids[-1]
-                                
-                                # Fetch the email
-                                status, msg_data = mail.fetch(latest_email_id, "(RFC822)")
-                                
-                                if status == "OK":
-                                    # Parse the email
-                                    raw_email = msg_data[0][1]
-                                    email_message = email.message_from_bytes(raw_email)
-                                    
-                                    # Extract email content
-                                    email_body = self.extract_email_body(email_message)
-                                    email_subject = email_message.get("Subject", "")
-                                    
-                                    log.info(f"Checking email with subject: {email_subject}")
-                                    
-                                    # Look for verification code patterns
-                                    code_patterns = [
-                                        r'\b(\d{6})\b',  # 6 digit code
-                                        r'\b(\d{4})\b',  # 4 digit code
-                                        r'\b(\d{8})\b',  # 8 digit code
-                                        r'verification code[:\s]*(\d+)',
-                                        r'code[:\s]*(\d+)',
-                                        r'Your.*code.*?(\d+)',
-                                        r'Enter.*code.*?(\d+)',
-                                        r'(\d+).*verification'
-                                    ]
-                                    
-                                    for pattern in code_patterns:
-                                        matches = re.findall(pattern, email_body, re.IGNORECASE)
-                                        if matches:
-                                            # Get the first match that looks like a verification code
-                                            for match in matches:
-                                                if len(match) >= 4 and len(match) <= 8:
-                                                    verification_code = match
-                                                    log.info(f"Found verification code: {verification_code}")
-                                                    break
-                                        
-                                        if verification_code:
-                                            break
-                                    
-                                    if verification_code:
-                                        break
-                    except Exception as e:
-                        log.warning(f"Error searching with criteria '{criteria}': {e}")
-                        continue
-                
-                mail.logout()
+                            # Look for verification code patterns
+                            verification_code = _first_code(_EMAIL_CODE_PATTERNS, email_body)
+                            if verification_code:
+                                log.info(f"Found verification code: {verification_code}")
+                                break
                 
-                if verification_code:
-                    log.info(f"Successfully retrieved 2FA code: {verification_code}")
-                    return verification_code
-                else:
-                    log.warning("No verification code found in recent emails")
-                    # Try waiting a bit longer and search again
-                    log.info("Waiting additional 15 seconds for email...")
-                    time.sleep(15)
+                    if verification_code:
+                        log.info(f"Successfully retrieved 2FA code: {verification_code}")
+                        return verification_code
+                    else:
+                        log.warning("No verification code found in recent emails")
+                        # Try waiting a bit longer and search again
+                        log.info(f"Waiting up to {self._timing('email_retry')} more seconds for email...")
                     
-                    # Try one more time with broader search
-                    try:
-                        mail = imaplib.IMAP4_SSL(imap_server, imap_port)
-                        mail.login(email_address, email_password)
-                        mail.select("inbox")
+                        # Try one more time with broader search, on the same session
+                        try:
+                            mail = self._imap_session(email_address, email_password)
+                            wait_for_new_mail(mail, self._timing('email_retry'), cancel_event)
+                            if cancel_event is not None and cancel_event.is_set():
+                                log.debug("2FA email lookup cancelled.")
+                                return None
                         
-                        # Broader search for any recent emails
-                        status, messages = mail.search(None, 'ALL')
-                        if status == "OK" and messages[0]:
-                            email_ids = messages[0].split()
-                            # Check last 5 emails
-                            for email_id in email_ids[-5:]:
-                                try:
-                                    status, msg_data = mail.fetch(email_id, "(RFC822)")
-                                    if status == "OK":
-                                        raw_email = msg_data[0][1]
-                                        email_message = email.message_from_bytes(raw_email)
-                                        email_body = self.extract_email_body(email_message)
-                                        
-                                        # Look for any numeric codes
-                                        matches = re.findall(r'\b(\d{4,8})\b', email_body)
-                                        for match in matches:
-                                            if len(match) >= 4 and len(match) <= 8:
-                                                log.info(f"Found potential code in recent email: {match}")
-                                                mail.logout()
-                                                return match
-                                except:
-                                    continue
-                        
-                        mail.logout()
-                    except:
-                        pass
+                            # Broader search for any recent emails: unread ones from yesterday on, not the whole mailbox
+                            status, messages = mail.uid('SEARCH', 'SINCE', since, 'UNSEEN')
+                            if status == "OK" and messages[0]:
+                                # Check last 5 emails
+                                for raw_headers, raw_text in self._fetch_newest_messages(mail, messages[0].split()):
+                                    # These are arbitrary recent emails: decide on the headers alone before decoding any body
+                                    headers = _HEADER_PARSER.parsebytes(raw_headers)
+                                    if not _CANDIDATE_EMAIL_RE.search(f"{headers.get('Subject', '')} {headers.get('From', '')}"):
+                                        log.debug(f"Skipping unrelated email: {headers.get('Subject', '')}")
+                                        continue
+                                    email_body = self.extract_email_body(email.message_from_bytes(raw_headers + raw_text))
+                                
+                                    # Look for any numeric codes
+                                    match = _first_code((_ANY_CODE_RE,), email_body)
+                                    if match:
+                                        log.info(f"Found potential code in recent email: {match}")
+                                        return match
+                        except (imaplib.IMAP4.abort, OSError) as e:
+                            log.debug(f"IMAP connection lost during the broader search: {e}")
+                            self._drop_imap()
+                        except Exception as e:
+                            log.debug(f"Broader 2FA email search failed: {e}")
                     
-                    return None
+                        return None
                     
-            except Exception as e:
-                log.error(f"Email login failed: {e}")
-                log.info("Note: For Gmail, you need to enable 2FA and create an App Password")
-                log.info("Run: python setup_email_automation.py")
-                return None
+                except Exception as e:
+                    self._drop_imap()
+                    log.error(f"Email login failed: {e}")
+                    log.info("Note: For Gmail, you need to enable 2FA and create an App Password")
+                    log.info("Run: python setup_email_automation.py")
+                    return None
                 
         except Exception as e:
             log.error(f"Failed to retrieve 2FA code from email: {e}")
-            # Fallback: try to extract code from page if it's pre-filled or visible
-            return self.extract_code_from_page()
+            # Runs on a worker thread (see handle_2fa_code_entry), so the page fallback is left to the caller
+            raise
+
+    @staticmethod
+    def _fetch_newest_messages(mail, uids: list) -> list:
+        """
+        Fetches the newest _EMAIL_FETCH_BATCH of the given UIDs in a single UID FETCH and returns
+        (raw_headers, raw_text) pairs, newest first. Only the headers needed to parse the MIME structure
+        are requested, and BODY.PEEK leaves the messages' \\Seen flag untouched.
+        """
+        newest = sorted(uids, key=int)[-_EMAIL_FETCH_BATCH:]
+        status, msg_data = mail.uid('FETCH', b','.join(newest), _EMAIL_FETCH_PARTS)
+        if status != "OK":
+            return []
+        messages = [] # [uid, raw_headers, raw_text] per message, in response order
+        for item in msg_data:
+            prefix = item[0] if isinstance(item, tuple) else item
+            if isinstance(item, tuple) and _FETCH_START_RE.match(prefix):
+                messages.append([0, b"", b""])
+            if not messages:
+                continue
+            uid = _FETCH_UID_RE.search(prefix)
+            if uid:
+                messages[-1][0] = int(uid.group(1))
+            if isinstance(item, tuple):
+                messages[-1][1 if b"HEADER" in prefix else 2] += item[1]
+        messages.sort(key=lambda message: message[0], reverse=True)
+        return [(raw_headers, raw_text) for _, raw_headers, raw_text in messages]
+
+    def _imap_session(self, email_address: str, email_password: str):
+        """
+        Returns a logged-in Gmail IMAP session with the inbox selected.
+        The session is kept between lookups; one idle for longer than _IMAP_NOOP_AFTER_SECONDS is checked
+        with a NOOP first, and replaced if the server has dropped it or belongs to a different address.
+        Callers hold _imap_lock.
+        """
+        if self._imap is not None and self._imap_account != email_address:
+            log.debug("Email address changed since the cached IMAP session was opened; reconnecting.")
+            self._drop_imap()
+        if self._imap is not None:
+            try:
+                if time.monotonic() - self._imap_last_used > _IMAP_NOOP_AFTER_SECONDS:
+                    self._imap.noop()
+                self._imap_last_used = time.monotonic()
+                return self._imap
+            except (imaplib.IMAP4.error, OSError) as e:
+                log.debug(f"Cached IMAP session is no longer usable, reconnecting: {e}")
+                self._drop_imap()
+
+        mail = imaplib.IMAP4_SSL(_IMAP_SERVER, _IMAP_PORT)
+        try:
+            mail.login(email_address, email_password)
+            mail.select("inbox")
+        except Exception:
+            try:
+                mail.shutdown()
+            except Exception:
+                pass
+            raise
+        log.info("Successfully connected to email account")
+        self._imap = mail
+        self._imap_account = email_address
+        self._imap_last_used = time.monotonic()
+        return mail
+
+    def _drop_imap(self):
+        """Logs out of the cached IMAP session, if any, ignoring errors from an already dead connection."""
+        with self._imap_lock:
+            mail, self._imap = self._imap, None
+            if mail is None:
+                return
+            try:
+                mail.logout()
+            except Exception as e:
+                log.debug(f"IMAP logout failed: {e}")
 
     def extract_email_body(self, email_message):
         """Extract text content from email message."""
@@ -1143,18 +1442,24 @@ class BrowserActor:
             body = ""
             
             if email_message.is_multipart():
+                html_part = None
                 for part in email_message.walk():
                     content_type = part.get_content_type()
                     if content_type == "text/plain":
                         body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
                         break
-                    elif content_type == "text/html" and not body:
-                        html_body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                        # Strip HTML tags for simple text extraction
-                        import re
-                        body = re.sub(r'<[^>]+>', '', html_body)
+                    elif content_type == "text/html" and html_part is None:
+                        html_part = part
+                else:
+                    # The HTML part is only parsed when there is no plain-text part to use instead
+                    if html_part is not None:
+                        html_body = html_part.get_payload(decode=True).decode('utf-8', errors='ignore')
+                        # Text only: style/script blocks are full of digit runs (colours, sizes) the code patterns would match
+                        body = _html_to_text(html_body)
             else:
                 body = email_message.get_payload(decode=True).decode('utf-8', errors='ignore')
+                if email_message.get_content_type() == "text/html":
+                    body = _html_to_text(body)
             
             return body
             
@@ -1166,24 +1471,12 @@ class BrowserActor:
         """Try to extract verification code from the current page if visible."""
         try:
             # Sometimes the code might be pre-filled or visible on the page
-            page_text = self.page.inner_text('body')
-            
-            import re
-            code_patterns = [
-                r'\b(\d{6})\b',
-                r'\b(\d{4})\b', 
-                r'\b(\d{8})\b'
-            ]
+            page_text = self.page.inner_text('body') # Rendered text only; script contents are full of digits
             
-            for pattern in code_patterns:
-                matches = re.findall(pattern, page_text)
-                if matches:
-                    for match in matches:
-                        if len(match) >= 4 and len(match) <= 8:
-                            log.info(f"Found code on page: {match}")
-                            return match
-            
-            return None
+            match = _first_code(_PAGE_CODE_PATTERNS, page_text)
+            if match:
+                log.info(f"Found code on page: {match}")
+            return match
             
         except Exception as e:
             log.error(f"Error extracting code from page: {e}")
@@ -1194,14 +1487,13 @@ class BrowserActor:
         try:
             log.info(f"Searching Amazon jobs. Specified location: '{current_location_to_search if current_location_to_search else 'None (generic search)'}'")
             
-            self.page.wait_for_load_state('domcontentloaded', timeout=5000)
-            
-            search_selectors = [
-                'input[placeholder*="Search"]',
-                'input[placeholder*="job"]',
-                'input[type="search"]',
-                '#search-jobs'
-            ]
+            # The job search app renders its form after the document loads, so wait for the form itself;
+            # the instant lookups below would otherwise miss fields that are still rendering
+            try:
+                self.page.locator(_SEARCH_INPUT_SELECTOR).or_(self.page.locator(_LOCATION_INPUT_SELECTOR)) \
+                    .locator("visible=true").first.wait_for(state="visible", timeout=5000)
+            except Exception:
+                log.debug("No visible search form after waiting; continuing with the page as it is.")
             
             keywords_config = self.config.get('keywords', {})
             required_keywords = keywords_config.get('required', [])
@@ -1210,80 +1502,62 @@ class BrowserActor:
 
             if keywords_to_search:
                 keyword_filled = False
-                for selector in search_selectors:
-                    try:
-                        search_field = self.page.locator(selector).first
-                        if search_field.is_visible(timeout=1000):
-                            search_field.fill(keywords_to_search)
-                            log.info(f"Filled search keywords: '{keywords_to_search}' using selector: {selector}")
-                            keyword_filled = True
-                            break
-                    except Exception as e:
-                        log.debug(f"Keyword search field selector {selector} failed or not visible: {e}")
-                        continue
+                try:
+                    search_field = self._first_visible(_SEARCH_INPUT_SELECTOR)
+                    if search_field is not None:
+                        search_field.fill(keywords_to_search)
+                        log.info(f"Filled search keywords: '{keywords_to_search}'")
+                        keyword_filled = True
+                except Exception as e:
+                    log.debug(f"Keyword search field could not be filled: {e}")
                 if not keyword_filled:
                     log.warning("Could not fill keywords for Amazon search.")
             else:
                 log.info("No keywords specified for Amazon search.")
 
-            location_selectors = [
-                'input[placeholder*="location"]',
-                'input[placeholder*="postcode"]', 
-                'input[placeholder*="city"]',
-                'input[aria-label*="location"]' # Added for robustness
-            ]
-            
             location_field_found_and_filled = False
             if current_location_to_search:
                 log.info(f"Attempting to fill location: '{current_location_to_search}'")
-                for selector in location_selectors:
-                    try:
-                        location_field = self.page.locator(selector).first
-                        if location_field.is_visible(timeout=1000):
-                            location_field.fill(current_location_to_search)
-                            log.info(f"Filled location '{current_location_to_search}' using selector: {selector}")
-                            location_field_found_and_filled = True
-                            break
-                    except Exception as e:
-                        log.debug(f"Location field selector {selector} failed or not visible: {e}")
-                        continue
+                try:
+                    location_field = self._first_visible(_LOCATION_INPUT_SELECTOR)
+                    if location_field is not None:
+                        location_field.fill(current_location_to_search)
+                        log.info(f"Filled location '{current_location_to_search}'")
+                        location_field_found_and_filled = True
+                except Exception as e:
+                    log.debug(f"Location field could not be filled: {e}")
                 if not location_field_found_and_filled:
                     log.warning(f"Could not find or fill location field for '{current_location_to_search}' on Amazon.")
             else:
                 log.info("No specific location provided for Amazon search (generic search). Clearing existing location if any.")
                 # Attempt to clear location field for a truly generic search if no location is passed
-                for selector in location_selectors:
-                    try:
-                        location_field = self.page.locator(selector).first
-                        if location_field.is_visible(timeout=500): # Shorter timeout for clearing
-                            current_val = location_field.input_value()
-                            if current_val: # Only clear if it has a value
-                                log.debug(f"Clearing existing location value '{current_val}' from field {selector}")
-                                location_field.fill("") # Clear the field
-                                location_field_found_and_filled = True # Mark as handled
-                            break
-                    except Exception:
-                        # If it fails, it might not be there, which is fine for clearing.
-                        log.debug(f"No pre-existing location found or error clearing field {selector}, continuing generic search.")
-                        continue
+                try:
+                    location_field = self._first_visible(_LOCATION_INPUT_SELECTOR)
+                    if location_field is not None:
+                        current_val = location_field.input_value()
+                        if current_val: # Only clear if it has a value
+                            log.debug(f"Clearing existing location value '{current_val}'")
+                            location_field.fill("") # Clear the field
+                            location_field_found_and_filled = True # Mark as handled
+                except Exception:
+                    # If it fails, it might not be there, which is fine for clearing.
+                    log.debug("No pre-existing location found or error clearing it, continuing generic search.")
             
             # Submit search
-            search_button_selectors = [
-                'button:has-text("Search")',
-                'input[type="submit"]',
-                'button[type="submit"]'
-            ]
-            
-            for selector in search_button_selectors:
-                try:
-                    search_button = self.page.query_selector(selector)
-                    if search_button and search_button.is_visible():
-                        search_button.click()
-                        self.page.wait_for_load_state('networkidle', timeout=10000) # Changed from time.sleep(5)
-                        log.info("Search submitted")
-                        break
-                except:
-                    continue
+            # Locators re-resolve on every action, unlike the ElementHandles query_selector returned,
+            # so a re-rendered search form cannot leave a stale handle behind
+            try:
+                search_button = self._first_visible(self._button(_SEARCH_BUTTON_NAME_RE), _SUBMIT_SELECTOR)
+                if search_button is not None:
+                    url_before_search = self.page.url
+                    search_button.click()
+                    # The search route carries the query, so the URL change marks the new results; waiting on it
+                    # (rather than networkidle, which a polling page may never reach) also keeps
+                    # extract_job_listings from matching the previous search's cards
+                    self._wait_for_navigation_from(url_before_search, timeout=10000)
+                    log.info("Search submitted")
+            except Exception as e:
+                log.debug(f"Search button not found or action failed: {e}")
             
             return True
             
@@ -1319,53 +1593,99 @@ class BrowserActor:
                 if self.identify_page_type() == self.PAGE_TYPE_ACCESS_DENIED: log.error("Access denied on Amazon.")
                 return []
             
-            job_elements = self.page.locator(job_card_s).all()
-            log.info(f"Found {len(job_elements)} potential Amazon job cards.")
+            cards = self._read_job_cards(job_card_s, {'title': title_s, 'company': company_s, 'location': location_s, 'link': link_s})
+            log.info(f"Found {len(cards)} potential Amazon job cards.")
             jobs = []
             base_url = self.config.get('job_site_url', "https://www.amazon.jobs")
 
-            for element in job_elements:
-                if not element.is_visible(timeout=200): continue # Skip non-visible cards quickly
-                try:
-                    title = element.locator(title_s).first.text_content(timeout=100).strip() if element.locator(title_s).count() > 0 else ""
-                    # Amazon is usually the company, but if a selector is provided, use it.
-                    company = "Amazon" # Default
-                    if company_s and element.locator(company_s).count() > 0:
-                        company_text = element.locator(company_s).first.text_content(timeout=100).strip()
-                        if company_text : company = company_text # Override default if found
-
-                    location = element.locator(location_s).first.text_content(timeout=100).strip() if element.locator(location_s).count() > 0 else ""
-                    link_href = element.locator(link_s).first.get_attribute('href', timeout=100) if element.locator(link_s).count() > 0 else ""
-                    link = urljoin(base_url, link_href) if link_href else ""
-
-                    if title: # Consider title essential
-                        jobs.append({'title': title, 'company': company, 'location': location, 'link': link,
-                                     'description': f"{title} at {company} in {location}", # Simple description
-                                     'source': 'Amazon'})
-                    else:
-                        log.debug(f"Skipping Amazon job card, title seems missing.")
-                        
-                except Exception as e_detail:
-                    log.warning(f"Error extracting detail from an Amazon job card: {e_detail}")
+            for card in cards:
+                if not card['visible']: continue # Skip non-visible cards
+                fields = card['fields']
+                title = fields['title']['text'] if fields['title'] else ""
+                # Amazon is usually the company, but if a selector is provided, use it.
+                company = "Amazon" # Default
+                if fields['company'] and fields['company']['text']:
+                    company = fields['company']['text'] # Override default if found
+
+                location = fields['location']['text'] if fields['location'] else ""
+                link_href = fields['link']['href'] if fields['link'] else ""
+                link = urljoin(base_url, link_href) if link_href else ""
+
+                if title: # Consider title essential
+                    jobs.append({'title': title, 'company': company, 'location': location, 'link': link,
+                                 'description': f"{title} at {company} in {location}", # Simple description
+                                 'source': 'Amazon'})
+                else:
+                    log.debug("Skipping Amazon job card, title seems missing.")
             
             log.info(f"Extracted {len(jobs)} Amazon job listings.")
             return jobs
         except Exception as e:
             log.error(f"Failed to extract Amazon job listings: {e}", exc_info=True); return []
 
-    def close_session(self):
-        """Clean up browser session."""
+    def _read_job_cards(self, card_selector: str, fields: dict) -> list:
+        """
+        Reads every job card matching card_selector as {'visible': bool, 'fields': {name: value}}, where each
+        value is None when the card has no match for that field's selector, or else a dict with the element's
+        trimmed 'text', its 'href' attribute and its own 'visible' flag.
+        Plain CSS field selectors are all resolved in one evaluate_all, instead of several locator round-trips
+        per card. If any of them uses Playwright-only syntax (text=, :has-text(), >>), every card is read
+        through Playwright locators instead, as before.
+        """
+        cards_locator = self.page.locator(card_selector)
+        cards = cards_locator.evaluate_all(_JOB_CARDS_JS, fields)
+        if cards is not None:
+            return cards
+        log.debug(f"Job field selectors {fields} are not all plain CSS; reading the cards through locators.")
+        cards = []
+        for card in cards_locator.all():
+            values = {}
+            for name, selector in fields.items():
+                element = card.locator(selector).first if selector else None
+                if element is None or element.count() == 0:
+                    values[name] = None
+                    continue
+                values[name] = {'text': (element.text_content() or '').strip(),
+                                'href': element.get_attribute('href'), 'visible': element.is_visible()}
+            cards.append({'visible': card.is_visible(), 'fields': values})
+        return cards
+
+    def close_session(self, keep_browser: bool = False):
+        """
+        Clean up browser session.
+        With keep_browser=True only the session's page and context are closed, and the next
+        start_session() reuses the running browser (and a persistent context) instead of relaunching.
+        """
+        self._secrets = {} # Decrypted passwords are not kept between checks
         try:
             if self.page and not self.page.is_closed():
                 self.page.close()
-            if self.context:
-                self.context.close() 
+            self.page = None
+            self._locator_cache = {}
+            persistent = bool(self.config.get('browser_user_data_dir'))
+            if self.context and not (keep_browser and persistent):
+                self.context.close()
+                self.context = None
+            self.session_active = False
+
+            if keep_browser:
+                log.info("Browser session closed (browser kept running for the next session)")
+                return
+
+            if self._2fa_lookup is not None:
+                # Let a still running email lookup finish with the IMAP session before it is logged out
+                executor, cancel_lookup = self._2fa_lookup
+                self._2fa_lookup = None
+                cancel_lookup.set()
+                executor.shutdown(wait=True)
+            self._drop_imap()
+
             if self.browser and self.browser.is_connected():
                 self.browser.close()
+            self.browser = None
             if self.playwright:
                 self.playwright.stop()
-            
-            self.session_active = False
+            self.playwright = None
             log.info("Browser session closed")
             
         except Exception as e:
@@ -1480,7 +1800,7 @@ class BrowserActor:
             log.error(f"Overall job search session failed for {job_site_type}: {e}", exc_info=True)
             return []
         finally:
-            self.close_session()
+            self.close_session(keep_browser=True) # The caller shuts the browser down with close_session()
 
     # --- Indeed Specific Methods ---
 
@@ -1563,57 +1883,40 @@ class BrowserActor:
                 return []
 
             log.info("Extracting Indeed job listings...")
-            job_elements = self.page.locator(job_card_selector).all()
-            log.info(f"Found {len(job_elements)} potential Indeed job cards.")
-
-            for element in job_elements:
-                try:
-                    title = ""
-                    title_elem = element.locator(selectors['title']).first # Use .first to avoid error if multiple, take one
-                    if title_elem.is_visible(timeout=500): # Quick check
-                       title = title_elem.text_content(timeout=500) or ""
-
-                    company = ""
-                    company_elem = element.locator(selectors['company']).first
-                    if company_elem.is_visible(timeout=500):
-                        company = company_elem.text_content(timeout=500) or ""
-
-                    location = ""
-                    location_elem = element.locator(selectors['location']).first
-                    if location_elem.is_visible(timeout=500):
-                        location = location_elem.text_content(timeout=500) or ""
-
-                    link = ""
-                    link_elem = element.locator(selectors['link']).first # Link often same as title
-                    if link_elem:
-                        href = link_elem.get_attribute('href', timeout=500)
-                        if href:
-                            link = urljoin(base_url, href) # Ensure absolute URL
-
-                    description_snippet = ""
-                    desc_selector = selectors.get('description_snippet')
-                    if desc_selector:
-                        desc_elem = element.locator(desc_selector).first
-                        if desc_elem.is_visible(timeout=500):
-                             description_snippet = desc_elem.text_content(timeout=500) or ""
-
-                    if title and company: # Consider a job valid if it has at least title and company
-                        job_data = {
-                            'title': title.strip(),
-                            'company': company.strip(),
-                            'location': location.strip(),
-                            'link': link.strip(),
-                            'description': description_snippet.strip(), # Using 'description' for consistency
-                            'source': 'Indeed'
-                        }
-                        jobs.append(job_data)
-                        log.debug(f"Extracted Indeed job: {title} at {company}")
-                    else:
-                        log.warning("Skipping an Indeed job card, title or company missing.")
-
-                except Exception as e_card:
-                    log.warning(f"Error extracting details from an Indeed job card: {e_card}")
-                    continue
+            cards = self._read_job_cards(job_card_selector, {
+                'title': selectors['title'],
+                'company': selectors['company'],
+                'location': selectors['location'],
+                'link': selectors['link'], # Link often same as title
+                'description_snippet': selectors.get('description_snippet'),
+            })
+            log.info(f"Found {len(cards)} potential Indeed job cards.")
+
+            def visible_text(field):
+                return field['text'] if field and field['visible'] else ""
+
+            for card in cards:
+                fields = card['fields']
+                title = visible_text(fields['title'])
+                company = visible_text(fields['company'])
+                location = visible_text(fields['location'])
+                href = fields['link']['href'] if fields['link'] else None
+                link = urljoin(base_url, href) if href else "" # Ensure absolute URL
+                description_snippet = visible_text(fields['description_snippet'])
+
+                if title and company: # Consider a job valid if it has at least title and company
+                    job_data = {
+                        'title': title,
+                        'company': company,
+                        'location': location,
+                        'link': link.strip(),
+                        'description': description_snippet, # Using 'description' for consistency
+                        'source': 'Indeed'
+                    }
+                    jobs.append(job_data)
+                    log.debug(f"Extracted Indeed job: {title} at {company}")
+                else:
+                    log.warning("Skipping an Indeed job card, title or company missing.")
 
             log.info(f"Extracted {len(jobs)} Indeed job listings.")
             return jobs
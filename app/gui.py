@@ -330,7 +330,7 @@ class App(ctk.CTk):
             try:
                 decrypted = security.decrypt(display_config.get("encrypted_job_site_password", ""), self.master_password)
                 display_config["job_site_password (enter to change)"] = decrypted
-            except:
+            except ValueError: # decrypt() reports a wrong master password or corrupt value this way
                 display_config["job_site_password (enter to change)"] = "DECRYPTION FAILED"
             del display_config["encrypted_job_site_password"]
 
@@ -338,7 +338,7 @@ class App(ctk.CTk):
              try:
                 decrypted = security.decrypt(display_config["email_automation"]["encrypted_email_app_password"], self.master_password)
                 display_config["email_automation"]["app_password (enter to change)"] = decrypted
-             except:
+             except ValueError:
                 display_config["email_automation"]["app_password (enter to change)"] = "DECRYPTION FAILED"
              del display_config["email_automation"]["encrypted_email_app_password"]
 
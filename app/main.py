@@ -150,5 +150,6 @@ def run_bot(
             stop_event.wait(error_sleep_seconds)
 
     log.info(f"[{profile_name}] Thread received stop signal. Cleaning up...")
+    browser_actor.close_session() # Sessions keep the browser running between checks; shut it down now
     state_manager.close()
     log.info(f"--- Sentinel Bot Thread Stopped for Profile: {profile_name} ---")
@@ -0,0 +1,180 @@
+import unittest
+import sys
+import os
+import email
+import datetime
+from unittest.mock import Mock
+
+# Adjust path to import from app module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.authenticator import _find_code, find_code_fast, _body_snippet, _quote, imap_date, _search_latest_uid, _mark_consumed, get_2fa_code
+
+
+def build_message(*parts):
+    """Builds a multipart/alternative message from (content_type, body) pairs."""
+    lines = ['MIME-Version: 1.0', 'Content-Type: multipart/alternative; boundary="b"', '']
+    for content_type, body in parts:
+        lines += ['--b', f'Content-Type: {content_type}; charset="utf-8"', '', body]
+    lines.append('--b--')
+    return email.message_from_bytes('\r\n'.join(lines).encode('utf-8'))
+
+
+class TestFindCode(unittest.TestCase):
+
+    def test_plain_text_single_part(self):
+        msg = email.message_from_bytes(b'Content-Type: text/plain\r\n\r\nYour verification code is 123456.')
+        self.assertEqual(_find_code(msg), '123456')
+
+    def test_plain_part_preferred_over_html(self):
+        msg = build_message(('text/plain', 'Code: 111111'), ('text/html', '<p>Code: 222222</p>'))
+        self.assertEqual(_find_code(msg), '111111')
+
+    def test_html_fallback_when_plain_has_no_code(self):
+        msg = build_message(('text/plain', 'See the HTML version.'), ('text/html', '<p>Code: <b>654321</b></p>'))
+        self.assertEqual(_find_code(msg), '654321')
+
+    def test_html_attributes_are_not_matched(self):
+        msg = build_message(('text/html', '<p style="color:#333333">No code here</p>'))
+        self.assertIsNone(_find_code(msg))
+
+    def test_text_attachments_are_skipped(self):
+        msg = email.message_from_bytes(
+            b'MIME-Version: 1.0\r\nContent-Type: multipart/mixed; boundary="b"\r\n\r\n'
+            b'--b\r\nContent-Type: text/plain\r\nContent-Disposition: attachment; filename="a.txt"\r\n\r\n999999\r\n'
+            b'--b\r\nContent-Type: text/plain\r\n\r\nCode: 123456\r\n--b--\r\n'
+        )
+        self.assertEqual(_find_code(msg), '123456')
+
+    def test_non_ascii_digits_are_not_matched(self):
+        msg = build_message(('text/html', '<p>\u0661\u0662\u0663\u0664\u0665\u0666</p>'))
+        self.assertIsNone(_find_code(msg))
+
+    def test_longer_digit_runs_are_not_matched(self):
+        msg = email.message_from_bytes(b'Content-Type: text/plain\r\n\r\nOrder 12345678 shipped.')
+        self.assertIsNone(_find_code(msg))
+
+
+class TestFindCodeFast(unittest.TestCase):
+
+    HEADERS = b'MIME-Version: 1.0\r\nContent-Type: multipart/alternative; boundary="123456"\r\n\r\n'
+
+    def test_same_code_in_plain_and_html(self):
+        body = b'--123456\r\n\r\nCode: 654321\r\n--123456\r\n\r\n<p>Code: <b>654321</b></p>\r\n--123456--\r\n'
+        self.assertEqual(find_code_fast(self.HEADERS, body), '654321')
+
+    def test_distinct_numbers_are_ambiguous(self):
+        self.assertIsNone(find_code_fast(b'', b'Code 111111, order 222222'))
+
+    def test_base64_content_is_not_scanned(self):
+        headers = b'Content-Type: text/plain\r\nContent-Transfer-Encoding: base64\r\n\r\n'
+        self.assertIsNone(find_code_fast(headers, b'MTIzNDU2+123456/'))
+
+    def test_quoted_printable_content_is_not_scanned(self):
+        headers = b'Content-Type: text/plain\r\nContent-Transfer-Encoding: quoted-printable\r\n\r\n'
+        self.assertIsNone(find_code_fast(headers, b'Your code is 4829=\r\n13. Order ref 771234'))
+
+    def test_quoted_printable_code_is_found_by_full_parse(self):
+        msg = email.message_from_bytes(
+            b'Content-Type: text/plain\r\nContent-Transfer-Encoding: quoted-printable\r\n\r\n'
+            b'Your code is 4829=\r\n13. Order ref 771234'
+        )
+        self.assertEqual(_find_code(msg), '482913')
+
+
+class TestBodySnippet(unittest.TestCase):
+
+    def test_snippet_is_truncated(self):
+        msg = email.message_from_bytes(b'Content-Type: text/plain\r\n\r\n' + b'x' * 500)
+        self.assertEqual(_body_snippet(msg), 'x' * 200)
+
+    def test_declared_charset_is_used(self):
+        msg = email.message_from_bytes(b'Content-Type: text/plain; charset="iso-8859-1"\r\n\r\nCaf\xe9')
+        self.assertEqual(_body_snippet(msg), 'Caf\u00e9')
+
+    def test_unknown_charset_falls_back_to_utf8(self):
+        msg = email.message_from_bytes(b'Content-Type: text/plain; charset="x-bogus"\r\n\r\nHello')
+        self.assertEqual(_body_snippet(msg), 'Hello')
+
+    def test_empty_body(self):
+        msg = email.message_from_bytes(b'Content-Type: text/plain\r\n\r\n')
+        self.assertEqual(_body_snippet(msg), '')
+
+class TestQuote(unittest.TestCase):
+
+    def test_plain_address(self):
+        self.assertEqual(_quote('no-reply@amazon.com'), '"no-reply@amazon.com"')
+
+    def test_quotes_and_backslashes_are_escaped(self):
+        self.assertEqual(_quote('a"b\\c'), '"a\\"b\\\\c"')
+
+class TestImapDate(unittest.TestCase):
+
+    def test_day_is_zero_padded(self):
+        self.assertEqual(imap_date(datetime.date(2024, 3, 5)), "05-Mar-2024")
+
+    def test_month_abbreviation_does_not_depend_on_locale(self):
+        self.assertEqual(imap_date(datetime.date(2023, 12, 31)), "31-Dec-2023")
+
+class FakeSearchMail:
+    """Minimal stand-in for an IMAP4 session that records UID SEARCH commands."""
+
+    def __init__(self, capabilities, search_ids=b'', esearch_line=None):
+        self.capabilities = capabilities
+        self.search_ids = search_ids
+        self.esearch_line = esearch_line
+        self.commands = []
+
+    def uid(self, command, *args):
+        self.commands.append((command,) + args)
+        return 'OK', [self.search_ids]
+
+    def response(self, code):
+        return code, [self.esearch_line]
+
+
+class TestSearchLatestUid(unittest.TestCase):
+
+    def test_plain_search_returns_last_uid(self):
+        mail = FakeSearchMail(('IMAP4REV1',), search_ids=b'41 42 44')
+        self.assertEqual(_search_latest_uid(mail, ['UNSEEN']), b'44')
+        self.assertEqual(mail.commands, [('SEARCH', 'UNSEEN')])
+
+    def test_plain_search_without_matches(self):
+        mail = FakeSearchMail(('IMAP4REV1',))
+        self.assertIsNone(_search_latest_uid(mail, ['UNSEEN']))
+
+    def test_esearch_returns_max_uid(self):
+        mail = FakeSearchMail(('IMAP4REV1', 'ESEARCH'), esearch_line=b'(TAG "A5") UID MAX 44')
+        self.assertEqual(_search_latest_uid(mail, ['UNSEEN']), b'44')
+        self.assertEqual(mail.commands, [('SEARCH', 'RETURN', '(MAX)', 'UNSEEN')])
+
+    def test_esearch_without_matches(self):
+        mail = FakeSearchMail(('IMAP4REV1', 'ESEARCH'), esearch_line=b'(TAG "A5") UID')
+        self.assertIsNone(_search_latest_uid(mail, ['UNSEEN']))
+
+class TestMarkConsumed(unittest.TestCase):
+
+    def test_delete_expunges_only_this_uid_with_uidplus(self):
+        mail = FakeSearchMail(('IMAP4REV1', 'UIDPLUS'))
+        mail.expunge = Mock()
+        _mark_consumed(mail, b'44', 'a@example.com', delete=True)
+        self.assertEqual(mail.commands, [('STORE', b'44', '+FLAGS', '(\\Seen \\Deleted)'), ('EXPUNGE', b'44')])
+        mail.expunge.assert_not_called()
+
+    def test_delete_without_uidplus_only_flags(self):
+        mail = FakeSearchMail(('IMAP4REV1',))
+        mail.expunge = Mock()
+        _mark_consumed(mail, b'44', 'a@example.com', delete=True)
+        self.assertEqual(mail.commands, [('STORE', b'44', '+FLAGS', '(\\Seen \\Deleted)')])
+        mail.expunge.assert_not_called()
+
+class TestGet2faCodeConfig(unittest.TestCase):
+
+    def test_missing_sender_fails_before_connecting(self):
+        config = {"email_address": "a@example.com", "email_app_password": "secret", "email_imap_server": "imap.example.com"}
+        with self.assertRaisesRegex(ValueError, "confirmation_email_sender"):
+            get_2fa_code(config)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+import sys
+import os
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+# Adjust path to import from app module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# test_main replaces this module with a MagicMock; make sure the real one is imported here
+if isinstance(sys.modules.get('app.browser_actor'), MagicMock):
+    del sys.modules['app.browser_actor']
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from app.browser_actor import BrowserActor, _EMAIL_SEARCH_CRITERIA, _EMAIL_SEARCH_QUERY, _html_to_text
+
+
+class TestEmailSearchQuery(unittest.TestCase):
+
+    def test_criteria_are_folded_into_nested_ors(self):
+        a, b, c, d, e, f, g = _EMAIL_SEARCH_CRITERIA
+        self.assertEqual(_EMAIL_SEARCH_QUERY, f"OR {a} OR {b} OR {c} OR {d} OR {e} OR {f} {g}")
+
+    def test_one_or_per_additional_criterion(self):
+        self.assertEqual(_EMAIL_SEARCH_QUERY.count("OR ("), len(_EMAIL_SEARCH_CRITERIA) - 1)
+
+
+class TestHtmlToText(unittest.TestCase):
+
+    def test_tags_are_replaced_by_spaces(self):
+        self.assertEqual(_html_to_text("<p>Your code</p><p>123456</p>").split(), ["Your", "code", "123456"])
+
+    def test_entities_are_decoded(self):
+        self.assertEqual(_html_to_text("Code:&nbsp;123456 &amp; more"), "Code: 123456 & more")
+
+    def test_script_and_style_contents_are_dropped(self):
+        html = "<style>.c { color: #111111 }</style><script>var id = 222222;</script><p>Code 333333</p>"
+        self.assertEqual(_html_to_text(html).split(), ["Code", "333333"])
+
+    def test_text_after_nested_skipped_tags_is_kept(self):
+        html = "<script><script>444444</script></script><b>555555</b>"
+        self.assertEqual(_html_to_text(html).split(), ["555555"])
+
+
+class FakeFetchMail:
+    """Minimal stand-in for an IMAP4 session that answers UID FETCH with a canned response."""
+
+    def __init__(self, msg_data, status='OK'):
+        self.msg_data = msg_data
+        self.status = status
+        self.commands = []
+
+    def uid(self, command, *args):
+        self.commands.append((command,) + args)
+        return self.status, self.msg_data
+
+
+class TestFetchNewestMessages(unittest.TestCase):
+
+    def test_parts_are_grouped_per_message_newest_first(self):
+        mail = FakeFetchMail([
+            (b'1 (UID 41 BODY[HEADER.FIELDS (SUBJECT)] {14}', b'Subject: old\r\n'),
+            (b' BODY[TEXT] {6}', b'111111'),
+            b')',
+            (b'2 (UID 44 BODY[HEADER.FIELDS (SUBJECT)] {14}', b'Subject: new\r\n'),
+            (b' BODY[TEXT] {6}', b'222222'),
+            b')',
+        ])
+        messages = BrowserActor._fetch_newest_messages(mail, [b'41', b'44'])
+        self.assertEqual(messages, [(b'Subject: new\r\n', b'222222'), (b'Subject: old\r\n', b'111111')])
+
+    def test_uid_reported_after_the_literals(self):
+        mail = FakeFetchMail([
+            (b'1 (BODY[HEADER.FIELDS (SUBJECT)] {14}', b'Subject: new\r\n'),
+            (b' BODY[TEXT] {6}', b'222222'),
+            b' UID 44)',
+            (b'2 (BODY[HEADER.FIELDS (SUBJECT)] {14}', b'Subject: old\r\n'),
+            (b' BODY[TEXT] {6}', b'111111'),
+            b' UID 9)',
+        ])
+        messages = BrowserActor._fetch_newest_messages(mail, [b'9', b'44'])
+        self.assertEqual([text for _, text in messages], [b'222222', b'111111'])
+
+    def test_only_the_newest_uids_are_fetched(self):
+        mail = FakeFetchMail([])
+        BrowserActor._fetch_newest_messages(mail, [b'10', b'9', b'100', b'8', b'11', b'7', b'12'])
+        self.assertEqual(mail.commands[0][1], b'9,10,11,12,100')
+
+    def test_failed_fetch_returns_nothing(self):
+        mail = FakeFetchMail([None], status='NO')
+        self.assertEqual(BrowserActor._fetch_newest_messages(mail, [b'1']), [])
+
+
+class TestReadJobCards(unittest.TestCase):
+
+    def test_plain_css_fields_are_read_in_one_call(self):
+        actor = BrowserActor({})
+        actor.page = MagicMock()
+        cards = [{'visible': True, 'fields': {'title': None}}]
+        actor.page.locator.return_value.evaluate_all.return_value = cards
+        self.assertEqual(actor._read_job_cards("div.job", {'title': "h3"}), cards)
+        actor.page.locator.return_value.all.assert_not_called()
+
+    def test_playwright_only_selectors_fall_back_to_locators(self):
+        card = MagicMock()
+        card.is_visible.return_value = True
+        title = card.locator.return_value.first
+        title.count.return_value = 1
+        title.text_content.return_value = "  Python Developer "
+        title.get_attribute.return_value = None
+        title.is_visible.return_value = True
+        actor = BrowserActor({})
+        actor.page = MagicMock()
+        actor.page.locator.return_value.evaluate_all.return_value = None # A field selector is not plain CSS
+        actor.page.locator.return_value.all.return_value = [card]
+        cards = actor._read_job_cards("div.job", {'title': "h3:has-text('Developer')", 'company': None})
+        self.assertEqual(cards, [{'visible': True, 'fields': {
+            'title': {'text': "Python Developer", 'href': None, 'visible': True}, 'company': None}}])
+        card.locator.assert_called_once_with("h3:has-text('Developer')")
+
+
+class TestWaitForCodeOrManualEntry(unittest.TestCase):
+
+    STEP_URL = "https://www.amazon.jobs/ap/cvf/verify?arb=abc"
+
+    def make_actor(self, url_after_wait):
+        """Returns an actor whose page only leaves STEP_URL if url_after_wait differs from it."""
+        page = MagicMock()
+        page.url = self.STEP_URL
+
+        def wait_for_url(predicate, timeout):
+            page.url = url_after_wait
+            if not predicate(page.url):
+                raise PlaywrightTimeoutError(f"Timeout {timeout}ms exceeded.")
+
+        page.wait_for_url.side_effect = wait_for_url
+        actor = BrowserActor({'timings': {'email_code_timeout': 0.05}})
+        actor.page = page
+        return actor
+
+    def test_unchanged_url_is_not_manual_entry(self):
+        actor = self.make_actor(self.STEP_URL)
+        self.assertFalse(actor._wait_for_code_or_manual_entry(Future()))
+        self.assertTrue(actor.page.wait_for_url.called)
+
+    def test_url_change_is_manual_entry(self):
+        actor = self.make_actor("https://www.amazon.jobs/app#/jobSearch")
+        self.assertTrue(actor._wait_for_code_or_manual_entry(Future()))
+
+    def test_finished_lookup_returns_without_waiting(self):
+        actor = self.make_actor(self.STEP_URL)
+        code_future = Future()
+        code_future.set_result("123456")
+        self.assertFalse(actor._wait_for_code_or_manual_entry(code_future))
+        actor.page.wait_for_url.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
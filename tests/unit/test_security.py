@@ -0,0 +1,22 @@
+import unittest
+import sys
+import os
+
+# Adjust path to import from app module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.security import encrypt, decrypt
+
+
+class TestDecrypt(unittest.TestCase):
+
+    def test_round_trip(self):
+        self.assertEqual(decrypt(encrypt("s3cret", "master"), "master"), "s3cret")
+
+    def test_wrong_password_fails(self):
+        encrypted = encrypt("s3cret", "master")
+        with self.assertRaises(ValueError):
+            decrypt(encrypted, "wrong")
+
+if __name__ == '__main__':
+    unittest.main()